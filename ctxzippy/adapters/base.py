@@ -1,11 +1,62 @@
 """Base storage adapter protocol and types."""
 
+import io
+import sys
 from abc import ABC, abstractmethod
-from typing import Protocol, Optional, Union, IO
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Protocol, Optional, Union, IO
 from dataclasses import dataclass
 
+# Use __slots__ for small, frequently created dataclasses where supported (Python 3.10+)
+_SLOTS: Dict[str, Any] = {"slots": True} if sys.version_info >= (3, 10) else {}
 
-@dataclass
+
+# Characters str.splitlines treats as line breaks ("\\r\\n" counts as one)
+_LINE_BREAKS = frozenset("\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029")
+
+
+def _iter_split_lines(chunks: Iterable[str]) -> Iterator[str]:
+    """
+    Split streamed text into lines exactly as ``str.splitlines`` would split
+    the whole text, without line endings.
+
+    Pieces of a line spanning several chunks are collected and joined once,
+    so long lines cost linear time, and a ``\\r\\n`` pair split across a chunk
+    boundary still counts as a single line break.
+    """
+    fragments: List[str] = []
+    after_cr = False
+    for chunk in chunks:
+        if not chunk:
+            continue
+        if after_cr and chunk.startswith("\n"):
+            chunk = chunk[1:]
+        after_cr = False
+        parts = chunk.splitlines(keepends=True)
+        if not parts:
+            continue
+        last = parts.pop()
+        for part in parts:
+            # Every part but the last ends with a line break
+            line = part[:-2] if part.endswith("\r\n") else part[:-1]
+            if fragments:
+                fragments.append(line)
+                line = "".join(fragments)
+                fragments.clear()
+            yield line
+        if last[-1] in _LINE_BREAKS:
+            after_cr = last.endswith("\r")
+            line = last[:-2] if last.endswith("\r\n") else last[:-1]
+            fragments.append(line)
+            yield "".join(fragments)
+            fragments.clear()
+        else:
+            fragments.append(last)
+    if fragments:
+        yield "".join(fragments)
+
+
+@dataclass(**_SLOTS)
 class StorageWriteParams:
     """Parameters for writing to storage."""
 
@@ -14,14 +65,14 @@ class StorageWriteParams:
     content_type: Optional[str] = None
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class StorageReadParams:
     """Parameters for reading from storage."""
 
     key: str
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class StorageWriteResult:
     """Result of a storage write operation."""
 
@@ -35,6 +86,16 @@ class StorageAdapter(Protocol):
 
     Implementations should provide pluggable backends (filesystem, S3, etc.)
     while maintaining a consistent interface.
+
+    Adapters may optionally provide ``open_write_stream(key, content_type=None) -> IO[bytes]``
+    (see SupportsWriteStream); when present, compaction serializes large JSON
+    outputs directly into it.
+    Likewise, ``write_from_path(src_path, key)`` is used, when present, to
+    persist tool outputs that already live in a local file.
+    ``iter_lines(params) -> Iterator[str]`` lets grep stream content line by
+    line and stop reading once enough matches are found,
+    ``read_bytes(params) -> bytes`` returns raw content without decoding it, and
+    ``write_many(params_list) -> List[StorageWriteResult]`` writes a batch.
     """
 
     def write(self, params: StorageWriteParams) -> StorageWriteResult:
@@ -99,6 +160,23 @@ class StorageAdapter(Protocol):
         ...
 
 
+class SupportsWriteStream(Protocol):
+    """Optional adapter capability: write a payload through a binary stream."""
+
+    def open_write_stream(self, key: str, content_type: Optional[str] = None) -> IO[bytes]:
+        """
+        Open a binary stream that stores what is written to it under a key.
+
+        Args:
+            key: The storage key to write
+            content_type: Optional MIME type of the content
+
+        Returns:
+            A writable binary stream; the caller must close it
+        """
+        ...
+
+
 class BaseStorageAdapter(ABC):
     """Abstract base class for storage adapters with common functionality."""
 
@@ -117,11 +195,41 @@ class BaseStorageAdapter(ABC):
         Default implementation that reads all text and returns a BytesIO stream.
         Subclasses should override for more efficient streaming.
         """
-        import io
-
         text = self.read_text(params)
         return io.BytesIO(text.encode("utf-8"))
 
+    def read_bytes(self, params: StorageReadParams) -> bytes:
+        """
+        Default implementation that reads the whole read stream.
+        Subclasses may override with a more direct read.
+        """
+        stream = self.open_read_stream(params)
+        try:
+            return stream.read()
+        finally:
+            stream.close()
+
+    def iter_lines(self, params: StorageReadParams) -> Iterator[str]:
+        """
+        Default implementation that reads all text and yields its lines.
+        Subclasses should override to stream without loading the whole content.
+        """
+        return iter(self.read_text(params).splitlines())
+
+    def write_many(self, params_list: Iterable[StorageWriteParams]) -> List[StorageWriteResult]:
+        """
+        Default implementation that writes each item in turn.
+        Subclasses should override to issue the writes concurrently.
+        """
+        return [self.write(params) for params in params_list]
+
+    def write_from_path(self, src_path: Union[str, Path], key: str) -> StorageWriteResult:
+        """
+        Default implementation that reads an existing file and writes its bytes.
+        Subclasses should override to copy without loading the file into memory.
+        """
+        return self.write(StorageWriteParams(key=key, body=Path(src_path).read_bytes()))
+
     @abstractmethod
     def resolve_key(self, name: str) -> str:
         """Resolve a logical name to a storage key."""
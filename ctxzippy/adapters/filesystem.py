@@ -1,12 +1,133 @@
 """Filesystem storage adapter implementation."""
 
+import io
+import mmap
 import os
+import re
+import shutil
+import uuid
 from pathlib import Path
-from typing import Optional, Union, IO
-from urllib.parse import urlparse
-from urllib.request import url2pathname
+from typing import Any, Iterator, Optional, Set, Union, IO, cast
+from urllib.parse import quote, unquote, urlparse
 
-from .base import BaseStorageAdapter, StorageWriteParams, StorageReadParams, StorageWriteResult
+from .base import (
+    BaseStorageAdapter,
+    StorageWriteParams,
+    StorageReadParams,
+    StorageWriteResult,
+    _iter_split_lines,
+)
+
+# Key sanitization: normalize backslashes, then strip "../" sequences
+_BACKSLASH_TRANS = str.maketrans("\\", "/")
+_TRAVERSAL_RE = re.compile(r"\.\./")
+
+# Plain file:///path URIs (no query, fragment or characters urlparse strips),
+# parsed without urlparse
+_FILE_URI_RE = re.compile(r"file://(/[^?#\t\r\n]*)")
+
+# Flags for raw file writes (O_BINARY disables newline translation on Windows)
+_WRITE_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+
+# Flags for the temporary file behind a write stream; it must not already exist
+_TEMP_WRITE_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0)
+
+# Files at least this large are memory-mapped for reading; below it the mmap
+# setup costs more than a plain buffered read
+_MMAP_THRESHOLD = 64 * 1024
+
+# Characters read per chunk when streaming a file line by line
+_LINE_CHUNK_SIZE = 128 * 1024
+
+
+class _MmapReader(io.RawIOBase):
+    """
+    Read-only binary stream backed by a memory-mapped file.
+
+    Pages are faulted in on access instead of being copied by read() syscalls.
+    The mapping is read-only; since keys are written once and then only read,
+    no concurrent writer to the same file is expected while a stream is open.
+    """
+
+    def __init__(self, mm: mmap.mmap):
+        self._mm = mm
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def read(self, size: Optional[int] = -1) -> bytes:
+        return self._mm.read(None if size is None or size < 0 else size)
+
+    def readall(self) -> bytes:
+        return self._mm.read()
+
+    def readinto(self, buffer) -> int:
+        pos = self._mm.tell()
+        n = min(len(buffer), self._mm.size() - pos)
+        with memoryview(self._mm) as view:
+            buffer[:n] = view[pos : pos + n]
+        self._mm.seek(pos + n)
+        return n
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        # Resolve to an absolute offset; mmap.seek only accepts literal whence values
+        if whence == io.SEEK_CUR:
+            offset += self._mm.tell()
+        elif whence == io.SEEK_END:
+            offset += len(self._mm)
+        elif whence != io.SEEK_SET:
+            raise ValueError(f"invalid whence ({whence}, should be 0, 1 or 2)")
+        self._mm.seek(offset)
+        return self._mm.tell()
+
+    def tell(self) -> int:
+        return self._mm.tell()
+
+    def close(self) -> None:
+        if not self.closed:
+            self._mm.close()
+        super().close()
+
+
+class _AtomicWriteStream(io.BufferedWriter):
+    """
+    Buffered binary stream that writes to a temporary file next to the target
+    and moves it into place when closed cleanly.
+
+    If writing fails (an exception inside the ``with`` block or an error while
+    flushing), the temporary file is removed, so readers never see a partially
+    written file under the key.
+    """
+
+    def __init__(self, path: Path):
+        self._path = path
+        self._tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+        fd = os.open(self._tmp_path, _TEMP_WRITE_FLAGS, 0o666)
+        super().__init__(io.FileIO(fd, "wb"), buffer_size=1 << 20)
+        self._discard = False
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        try:
+            super().close()
+        except BaseException:
+            self._discard = True
+            raise
+        finally:
+            if self._discard:
+                os.unlink(self._tmp_path)
+            else:
+                os.replace(self._tmp_path, self._path)
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        # Don't publish a partially written file
+        if exc_type is not None:
+            self._discard = True
+        self.close()
 
 
 class FileStorageAdapter(BaseStorageAdapter):
@@ -27,42 +148,96 @@ class FileStorageAdapter(BaseStorageAdapter):
         """
         self.base_dir = Path(base_dir).resolve()
         self.prefix = prefix or ""
+        self._prefix_clean = self.prefix.rstrip("/")
 
         # Ensure base directory exists
         self.base_dir.mkdir(parents=True, exist_ok=True)
 
+        # Directories already known to exist, so repeated writes skip mkdir
+        self._mkdir_cache: Set[Path] = {self.base_dir}
+
+        # The URI representation never changes, so build it once
+        base_uri = self.base_dir.as_uri()
+        self._url_base = base_uri.rstrip("/")
+        # Ensure single slash between base and prefix
+        self._str = f"{self._url_base}/{self.prefix}" if self.prefix else base_uri
+
     def resolve_key(self, name: str) -> str:
         """
         Resolve a logical name to a storage key.
 
         Sanitizes the name to prevent path traversal attacks.
         """
-        # Remove any path traversal attempts
-        safe_name = name.replace("\\", "/").replace("../", "").lstrip("/")
+        # Remove any path traversal attempts (leading slashes are stripped last,
+        # since removing "../" can expose a new one)
+        safe_name = _TRAVERSAL_RE.sub("", name.translate(_BACKSLASH_TRANS)).lstrip("/")
 
         if self.prefix:
-            # Remove trailing slash from prefix and combine
-            prefix_clean = self.prefix.rstrip("/")
-            return f"{prefix_clean}/{safe_name}"
+            return f"{self._prefix_clean}/{safe_name}"
         return safe_name
 
+    def _ensure_parent(self, full_path: Path) -> Path:
+        """Create the parent directory of a path once and return it."""
+        parent = full_path.parent
+        if parent not in self._mkdir_cache:
+            parent.mkdir(parents=True, exist_ok=True)
+            self._mkdir_cache.add(parent)
+        return parent
+
     def write(self, params: StorageWriteParams) -> StorageWriteResult:
         """Write content to a file."""
         full_path = self.base_dir / params.key
 
         # Create parent directories if needed
-        full_path.parent.mkdir(parents=True, exist_ok=True)
+        parent = self._ensure_parent(full_path)
 
-        # Write content
-        if isinstance(params.body, str):
-            full_path.write_text(params.body, encoding="utf-8")
-        else:
-            full_path.write_bytes(params.body)
+        # Write content with raw fd I/O, bypassing the text/buffered layers
+        data = params.body.encode("utf-8") if isinstance(params.body, str) else params.body
+        try:
+            fd = os.open(full_path, _WRITE_FLAGS, 0o666)
+        except FileNotFoundError:
+            # Cached parent was removed behind our back; recreate it
+            parent.mkdir(parents=True, exist_ok=True)
+            fd = os.open(full_path, _WRITE_FLAGS, 0o666)
+        try:
+            view = memoryview(data)
+            while view:
+                written = os.write(fd, view)
+                view = view[written:]
+        finally:
+            os.close(fd)
 
         # Return result with file:// URL
-        url = full_path.as_uri()
+        url = f"{self._url_base}/{quote(params.key)}"
         return StorageWriteResult(key=params.key, url=url)
 
+    def write_from_path(self, src_path: Union[str, Path], key: str) -> StorageWriteResult:
+        """
+        Copy an existing file into storage.
+
+        Uses shutil.copyfile, which lets the kernel copy the data (sendfile on
+        Linux, fcopyfile on macOS) without passing it through Python buffers.
+        """
+        full_path = self.base_dir / key
+        self._ensure_parent(full_path)
+        shutil.copyfile(src_path, full_path)
+
+        url = f"{self._url_base}/{quote(key)}"
+        return StorageWriteResult(key=key, url=url)
+
+    def open_write_stream(self, key: str, content_type: Optional[str] = None) -> IO[bytes]:
+        """
+        Open a binary stream that writes directly to the file for a key.
+
+        Lets callers serialize large payloads straight to disk without
+        building the whole body in memory first. The caller must close it;
+        the file appears under the key only once the stream closes without
+        an error. Like write(), the filesystem ignores content_type.
+        """
+        full_path = self.base_dir / key
+        self._ensure_parent(full_path)
+        return _AtomicWriteStream(full_path)
+
     def read_text(self, params: StorageReadParams) -> str:
         """Read text content from a file."""
         full_path = self.base_dir / params.key
@@ -72,22 +247,74 @@ class FileStorageAdapter(BaseStorageAdapter):
 
         return full_path.read_text(encoding="utf-8")
 
+    def read_bytes(self, params: StorageReadParams) -> bytes:
+        """Read the raw bytes of a file."""
+        full_path = self.base_dir / params.key
+
+        if not full_path.exists():
+            raise FileNotFoundError(f"File not found: {params.key}")
+
+        return full_path.read_bytes()
+
+    def iter_lines(self, params: StorageReadParams) -> Iterator[str]:
+        """Yield the lines of a file without their line endings."""
+        full_path = self.base_dir / params.key
+
+        if not full_path.exists():
+            raise FileNotFoundError(f"File not found: {params.key}")
+
+        return self._iter_file_lines(full_path)
+
+    @staticmethod
+    def _iter_file_lines(full_path: Path) -> Iterator[str]:
+        # newline="" leaves line breaks untranslated so they split like read_text().splitlines()
+        with open(full_path, "r", encoding="utf-8", newline="") as f:
+            yield from _iter_split_lines(iter(lambda: f.read(_LINE_CHUNK_SIZE), ""))
+
     def open_read_stream(self, params: StorageReadParams) -> IO[bytes]:
-        """Open a file stream for reading."""
+        """
+        Open a file stream for reading.
+
+        Files of 64 KiB or more are memory-mapped rather than read through a buffer.
+        """
         full_path = self.base_dir / params.key
 
         if not full_path.exists():
             raise FileNotFoundError(f"File not found: {params.key}")
 
+        # Memory-map large files; small ones use a regular buffered file
+        if full_path.stat().st_size >= _MMAP_THRESHOLD:
+            # _MmapReader implements the read side of IO[bytes]
+            return cast(IO[bytes], _MmapReader(self._map_file(full_path)))
+
         return open(full_path, "rb")
 
+    def read_mmap(self, params: StorageReadParams) -> mmap.mmap:
+        """
+        Memory-map a file read-only, e.g. for regex scanning without a copy.
+
+        The caller is responsible for closing the returned map. Empty files
+        cannot be mapped and raise ``ValueError``.
+        """
+        full_path = self.base_dir / params.key
+
+        if not full_path.exists():
+            raise FileNotFoundError(f"File not found: {params.key}")
+
+        return self._map_file(full_path)
+
+    @staticmethod
+    def _map_file(full_path: Path) -> mmap.mmap:
+        fd = os.open(full_path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+        try:
+            return mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+        finally:
+            # The mapping stays valid after the descriptor is closed
+            os.close(fd)
+
     def __str__(self) -> str:
         """Return a file:// URI representation."""
-        base_uri = self.base_dir.as_uri()
-        if self.prefix:
-            # Ensure single slash between base and prefix
-            return f"{base_uri.rstrip('/')}/{self.prefix}"
-        return base_uri
+        return self._str
 
 
 def file_uri_to_options(uri: str) -> dict:
@@ -103,16 +330,22 @@ def file_uri_to_options(uri: str) -> dict:
     Raises:
         ValueError: If the URI is not a valid file:// URI
     """
+    # Fast path for the common local form (file:///path) with nothing to split off
+    match = _FILE_URI_RE.fullmatch(uri)
+    if match:
+        return {"base_dir": _local_path(match.group(1))}
+
     parsed = urlparse(uri)
     if parsed.scheme != "file":
         raise ValueError(f"Invalid file URI: {uri}")
 
-    # Convert URL path to local filesystem path
-    path = url2pathname(parsed.path)
+    return {"base_dir": _local_path(parsed.path)}
 
-    # On Windows, url2pathname might return paths like '\C:\path'
-    # We need to handle this case
-    if os.name == "nt" and path.startswith("\\"):
-        path = path[1:]
 
-    return {"base_dir": path}
+def _local_path(url_path: str) -> str:
+    """Decode the path of a file:// URI into a local filesystem path."""
+    path = unquote(url_path)
+    # On Windows drive paths look like '/C:/path'; drop the leading slash
+    if os.name == "nt" and path[2:3] == ":":
+        path = path[1:]
+    return path
@@ -1,7 +1,11 @@
 """AWS S3 storage adapter for ctx-zip."""
 
+import codecs
 import io
-from typing import Optional, Any, BinaryIO
+import re
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import IO, Dict, Iterable, List, Optional, Any, BinaryIO, Iterator, cast
 from urllib.parse import urlparse
 from dataclasses import dataclass
 
@@ -10,10 +14,90 @@ from .base import (
     StorageWriteParams,
     StorageWriteResult,
     StorageReadParams,
+    _SLOTS,
+    _iter_split_lines,
 )
 
+# Chunk sizes used when streaming objects line by line and as text
+_LINE_CHUNK_SIZE = 128 * 1024
+_TEXT_CHUNK_SIZE = 64 * 1024
 
-@dataclass
+# Concurrent uploads in write_many; matches botocore's default connection pool
+# size (max_pool_connections=10), so threads never wait on or discard connections
+_WRITE_MANY_WORKERS = 10
+
+# Bytes a write stream buffers in memory before spilling to a temporary file
+_SPOOL_MAX_SIZE = 8 * 1024 * 1024
+
+# boto3's default multipart_threshold; smaller streamed objects go up in a single
+# put_object call instead of through the transfer manager
+_MULTIPART_THRESHOLD = 8 * 1024 * 1024
+
+# Plain s3://bucket[/prefix] URIs (no query, fragment or characters urlparse strips),
+# parsed without urlparse
+_S3_URI_RE = re.compile(r"s3://([^/?#\[\]\t\r\n]+)(?:/([^?#\t\r\n]*))?")
+
+# Key sanitization: normalize backslashes, then strip "../" sequences
+_BACKSLASH_TRANS = str.maketrans("\\", "/")
+_TRAVERSAL_RE = re.compile(r"\.\./")
+
+
+class _S3WriteStream(io.BufferedIOBase):
+    """
+    Binary write stream that spools to memory (or a temporary file once large)
+    and uploads the result as a single object when closed.
+    """
+
+    def __init__(self, client: Any, bucket: str, key: str, content_type: Optional[str] = None):
+        self._client = client
+        self._bucket = bucket
+        self._key = key
+        self._content_type = content_type
+        self._spool = tempfile.SpooledTemporaryFile(max_size=_SPOOL_MAX_SIZE)
+        self._discard = False
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: Any) -> int:
+        if self.closed:
+            raise ValueError("I/O operation on closed S3 write stream")
+        self._spool.write(data)
+        return len(data)
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        try:
+            if not self._discard:
+                size = self._spool.tell()
+                self._spool.seek(0)
+                extra_args: Dict[str, str] = {}
+                if self._content_type:
+                    extra_args["ContentType"] = self._content_type
+                try:
+                    if size < _MULTIPART_THRESHOLD:
+                        self._client.put_object(
+                            Bucket=self._bucket, Key=self._key, Body=self._spool, **extra_args
+                        )
+                    else:
+                        self._client.upload_fileobj(
+                            self._spool, self._bucket, self._key, ExtraArgs=extra_args or None
+                        )
+                except Exception as e:
+                    raise IOError(f"Failed to write to S3: {e}")
+        finally:
+            self._spool.close()
+            super().close()
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        # Don't upload a partially written object
+        if exc_type is not None:
+            self._discard = True
+        self.close()
+
+
+@dataclass(**_SLOTS)
 class S3StorageOptions:
     """Configuration options for S3 storage adapter."""
     bucket: str
@@ -23,6 +107,7 @@ class S3StorageOptions:
     aws_secret_access_key: Optional[str] = None
     aws_session_token: Optional[str] = None
     endpoint_url: Optional[str] = None  # For S3-compatible services
+    verify_bucket: bool = True  # Check bucket access with head_bucket on construction
 
 
 class S3StorageAdapter:
@@ -45,6 +130,10 @@ class S3StorageAdapter:
         
         self.bucket = options.bucket
         self.prefix = options.prefix or ""
+        # Prefix as prepended to keys, with exactly one trailing slash
+        self._prefix = self.prefix.rstrip("/") + "/" if self.prefix else ""
+        # Identifier returned by __str__; built once since it keys known-key lookups
+        self._str = f"s3://{self.bucket}/{self.prefix}" if self.prefix else f"s3://{self.bucket}"
         
         # Build boto3 client configuration
         client_kwargs = {"service_name": "s3"}
@@ -61,11 +150,13 @@ class S3StorageAdapter:
         self.s3_client = boto3.client(**client_kwargs)
         self._boto3 = boto3
         
-        # Verify bucket exists and we have access
-        try:
-            self.s3_client.head_bucket(Bucket=self.bucket)
-        except Exception as e:
-            raise ValueError(f"Cannot access S3 bucket '{self.bucket}': {e}")
+        # Verify bucket exists and we have access (one network round trip;
+        # skip it when access is known to be fine)
+        if options.verify_bucket:
+            try:
+                self.s3_client.head_bucket(Bucket=self.bucket)
+            except Exception as e:
+                raise ValueError(f"Cannot access S3 bucket '{self.bucket}': {e}")
     
     def resolve_key(self, name: str) -> str:
         """
@@ -77,19 +168,15 @@ class S3StorageAdapter:
         Returns:
             The resolved S3 key with prefix applied
         """
-        # Sanitize the key name - remove path traversal attempts
-        safe_name = name.replace("\\", "/").lstrip("/")
-        # Remove any ../ sequences
-        while "../" in safe_name:
-            safe_name = safe_name.replace("../", "")
-        while "..\\" in safe_name:
-            safe_name = safe_name.replace("..\\", "")
+        # Sanitize the key name - remove path traversal attempts. Removal is
+        # repeated until nothing matches, since stripping one "../" can form
+        # another (e.g. "..././"); typical keys take a single pass.
+        safe_name = name.translate(_BACKSLASH_TRANS).lstrip("/")
+        removed = 1
+        while removed:
+            safe_name, removed = _TRAVERSAL_RE.subn("", safe_name)
         
-        if self.prefix:
-            # Ensure prefix ends with / if it's not empty
-            prefix = self.prefix.rstrip("/") + "/" if self.prefix else ""
-            return f"{prefix}{safe_name}"
-        return safe_name
+        return self._prefix + safe_name
     
     def write(self, params: StorageWriteParams) -> StorageWriteResult:
         """
@@ -130,6 +217,45 @@ class S3StorageAdapter:
         
         return StorageWriteResult(key=resolved_key, url=url)
     
+    def write_many(self, params_list: Iterable[StorageWriteParams]) -> List[StorageWriteResult]:
+        """
+        Write several objects to S3 concurrently.
+        
+        The boto3 client is thread-safe, so uploads share it (and its connection
+        pool) across a small thread pool instead of running one after another.
+        
+        Args:
+            params_list: Write parameters for each object
+            
+        Returns:
+            Results in the same order as params_list
+        """
+        params_list = list(params_list)
+        if len(params_list) <= 1:
+            return [self.write(params) for params in params_list]
+        
+        workers = min(_WRITE_MANY_WORKERS, len(params_list))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(self.write, params_list))
+    
+    def open_write_stream(self, key: str, content_type: Optional[str] = None) -> IO[bytes]:
+        """
+        Open a binary stream that uploads to S3 when closed.
+        
+        Lets callers serialize large payloads without building the whole body
+        in memory first; writes spill to a temporary file past a few MiB. The
+        caller must close it.
+        
+        Args:
+            key: The storage key to write (resolved like write() does)
+            content_type: Optional MIME type stored with the object
+            
+        Returns:
+            A writable binary stream
+        """
+        stream = _S3WriteStream(self.s3_client, self.bucket, self.resolve_key(key), content_type)
+        return cast(IO[bytes], stream)
+    
     def read_text(self, params: StorageReadParams) -> str:
         """
         Read text content from S3.
@@ -140,6 +266,22 @@ class S3StorageAdapter:
         Returns:
             The text content of the S3 object
         """
+        content = self.read_bytes(params)
+        try:
+            return content.decode("utf-8")
+        except UnicodeDecodeError as e:
+            raise IOError(f"Failed to read from S3: {e}")
+    
+    def read_bytes(self, params: StorageReadParams) -> bytes:
+        """
+        Read the raw content of an S3 object.
+        
+        Args:
+            params: Read parameters including the key
+            
+        Returns:
+            The bytes of the S3 object
+        """
         resolved_key = self.resolve_key(params.key)
         
         try:
@@ -147,13 +289,95 @@ class S3StorageAdapter:
                 Bucket=self.bucket,
                 Key=resolved_key
             )
-            content = response["Body"].read()
-            return content.decode("utf-8")
+            data: bytes = response["Body"].read()
+            return data
         except self.s3_client.exceptions.NoSuchKey:
             raise FileNotFoundError(f"S3 key not found: {resolved_key}")
         except Exception as e:
             raise IOError(f"Failed to read from S3: {e}")
     
+    def iter_lines(self, params: StorageReadParams) -> Iterator[str]:
+        """
+        Stream the lines of an S3 object without their line endings.
+        
+        The object is downloaded in chunks as lines are consumed, so callers
+        that stop early never fetch the rest of the body.
+        
+        Args:
+            params: Read parameters including the key
+            
+        Returns:
+            An iterator over the decoded lines
+        """
+        body = self.open_read_stream(params)
+        return _iter_split_lines(self._iter_body_text(body, _LINE_CHUNK_SIZE))
+    
+    def read_text_chunked(
+        self, params: StorageReadParams, chunk_size: int = _TEXT_CHUNK_SIZE
+    ) -> Iterator[str]:
+        """
+        Stream the text content of an S3 object as decoded chunks.
+        
+        The whole object is never held in memory at once, and multi-byte
+        characters split across chunk boundaries are decoded intact.
+        
+        Args:
+            params: Read parameters including the key
+            chunk_size: Number of bytes to download per chunk
+            
+        Returns:
+            An iterator over the decoded text chunks
+        """
+        body = self.open_read_stream(params)
+        return self._iter_body_text(body, chunk_size)
+    
+    @staticmethod
+    def _iter_body_text(body: Any, chunk_size: int) -> Iterator[str]:
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        try:
+            for chunk in iter(lambda: body.read(chunk_size), b""):
+                text = decoder.decode(chunk)
+                if text:
+                    yield text
+            tail = decoder.decode(b"", final=True)
+            if tail:
+                yield tail
+        finally:
+            body.close()
+    
+    def read_range(self, params: StorageReadParams, start: int, end: Optional[int] = None) -> bytes:
+        """
+        Read a byte range of an S3 object with a ranged GET.
+        
+        Args:
+            params: Read parameters including the key
+            start: Offset of the first byte to read
+            end: Offset one past the last byte to read; None reads to the end
+            
+        Returns:
+            The requested bytes (empty if the range starts past the end of the object)
+        """
+        resolved_key = self.resolve_key(params.key)
+        if end is not None and end <= start:
+            return b""
+        byte_range = f"bytes={start}-" if end is None else f"bytes={start}-{end - 1}"
+        
+        try:
+            response = self.s3_client.get_object(
+                Bucket=self.bucket,
+                Key=resolved_key,
+                Range=byte_range,
+            )
+            data: bytes = response["Body"].read()
+            return data
+        except self.s3_client.exceptions.NoSuchKey:
+            raise FileNotFoundError(f"S3 key not found: {resolved_key}")
+        except Exception as e:
+            response = getattr(e, "response", None)
+            if isinstance(response, dict) and response.get("Error", {}).get("Code") == "InvalidRange":
+                return b""
+            raise IOError(f"Failed to read from S3: {e}")
+    
     def open_read_stream(self, params: StorageReadParams) -> BinaryIO:
         """
         Open a readable stream for S3 content.
@@ -180,9 +404,7 @@ class S3StorageAdapter:
     
     def __str__(self) -> str:
         """Return a human-readable identifier for this adapter."""
-        if self.prefix:
-            return f"s3://{self.bucket}/{self.prefix}"
-        return f"s3://{self.bucket}"
+        return self._str
 
 
 def s3_uri_to_options(uri: str) -> S3StorageOptions:
@@ -202,6 +424,13 @@ def s3_uri_to_options(uri: str) -> S3StorageOptions:
         >>> s3_uri_to_options("s3://my-bucket/path/to/prefix")
         S3StorageOptions(bucket='my-bucket', prefix='path/to/prefix')
     """
+    match = _S3_URI_RE.fullmatch(uri)
+    if match:
+        bucket, path = match.groups()
+        # Same result as the urlparse path below: leading slashes are dropped,
+        # and a missing path gives no prefix
+        return S3StorageOptions(bucket=bucket, prefix=path.lstrip("/") if path is not None else None)
+    
     parsed = urlparse(uri)
     
     if parsed.scheme != "s3":
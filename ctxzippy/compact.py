@@ -1,6 +1,5 @@
 """Main compaction API for ctx-zip."""
 
-import json
 from typing import List, Dict, Any, Optional, Union, Callable
 from dataclasses import dataclass, field
 
@@ -8,6 +7,9 @@ from .adapters.base import StorageAdapter
 from .storage.resolver import create_storage_adapter
 from .strategies.write_tool_results import (
     write_tool_results_to_storage_strategy,
+    write_tool_results_to_storage_strategy_sync,
+    default_serialize_result,
+    DEFAULT_STORAGE_READER_TOOL_NAMES,
     WriteToolResultsToStorageOptions,
     Boundary,
 )
@@ -46,7 +48,7 @@ class CompactOptions:
     serialize_result: Optional[Callable[[Any], str]] = None
     """
     Function to convert tool outputs (objects) to strings before writing to storage.
-    Defaults to JSON.stringify with 2-space indentation.
+    Defaults to JSON with 2-space indentation (using orjson when installed).
     """
 
     storage_reader_tool_names: List[str] = field(default_factory=list)
@@ -56,14 +58,50 @@ class CompactOptions:
     Defaults include 'readFile' and 'grepAndSearchFile'.
     """
 
+    in_place: bool = False
+    """
+    Compact the given message list itself instead of returning a new list.
+    Tool-result parts are always rewritten in place; with this flag the outer
+    list is not copied either, so callers must not rely on the input being unchanged.
+    """
+
+    persist_file_outputs: bool = False
+    """
+    Also persist tool outputs of the form {"type": "file", "path": ...} by copying
+    the referenced local file into storage (without loading it into memory when
+    the adapter supports it).
+    """
+
     def __post_init__(self):
         """Set defaults after initialization."""
         if self.serialize_result is None:
-            self.serialize_result = lambda v: json.dumps(v, indent=2)
+            self.serialize_result = default_serialize_result
 
         # Add default reader tool names if not provided
         if not self.storage_reader_tool_names:
-            self.storage_reader_tool_names = ["readFile", "grepAndSearchFile"]
+            self.storage_reader_tool_names = list(DEFAULT_STORAGE_READER_TOOL_NAMES)
+
+
+def _build_strategy_options(options: CompactOptions) -> WriteToolResultsToStorageOptions:
+    """Resolve the storage adapter and build the strategy options."""
+    # Create storage adapter
+    adapter = create_storage_adapter(options.storage)
+    serialize_result = options.serialize_result or default_serialize_result
+
+    return WriteToolResultsToStorageOptions(
+        boundary=options.boundary,
+        adapter=adapter,
+        serialize_result=serialize_result,
+        # Built per call so later changes to the options are honoured; an empty
+        # list falls back to the default reader tool names
+        reader_set=frozenset(
+            options.storage_reader_tool_names or DEFAULT_STORAGE_READER_TOOL_NAMES
+        ),
+        # Custom serializers must see every value, so only stream the default format
+        stream_json_results=serialize_result is default_serialize_result,
+        in_place=options.in_place,
+        persist_file_outputs=options.persist_file_outputs,
+    )
 
 
 async def compact_messages(
@@ -100,17 +138,7 @@ async def compact_messages(
     if options is None:
         options = CompactOptions()
 
-    # Create storage adapter
-    adapter = create_storage_adapter(options.storage)
-
-    # Build strategy options
-    strategy_options = WriteToolResultsToStorageOptions(
-        boundary=options.boundary,
-        adapter=adapter,
-        serialize_result=options.serialize_result or (lambda v: json.dumps(v, indent=2)),
-        storage_reader_tool_names=options.storage_reader_tool_names
-        or ["readFile", "grepAndSearchFile"],
-    )
+    strategy_options = _build_strategy_options(options)
 
     # Apply the chosen strategy
     if options.strategy == "write-tool-results-to-storage":
@@ -126,6 +154,8 @@ def compact_messages_sync(
     Synchronous version of compact_messages for non-async contexts.
 
     Note: The underlying storage adapters should handle their I/O synchronously.
+    Writes are issued sequentially on the calling thread; no event loop is created,
+    so this is safe to call from inside a running loop (it will block that loop).
 
     Args:
         messages: List of message dictionaries with 'role', 'content', etc.
@@ -133,19 +163,18 @@ def compact_messages_sync(
 
     Returns:
         Modified list of messages with tool results replaced by storage references
+
+    Raises:
+        ValueError: If an unknown strategy is specified
     """
-    import asyncio
-
-    # Check if there's already an event loop running
-    try:
-        loop = asyncio.get_running_loop()
-        # If we're already in an async context, we can't use asyncio.run
-        # Create a task and run it
-        import concurrent.futures
-
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            future = executor.submit(asyncio.run, compact_messages(messages, options))
-            return future.result()
-    except RuntimeError:
-        # No event loop, we can use asyncio.run directly
-        return asyncio.run(compact_messages(messages, options))
+    # Use default options if not provided
+    if options is None:
+        options = CompactOptions()
+
+    strategy_options = _build_strategy_options(options)
+
+    # The strategy has a synchronous core, so no event loop is needed here
+    if options.strategy == "write-tool-results-to-storage":
+        return write_tool_results_to_storage_strategy_sync(messages, strategy_options)
+    else:
+        raise ValueError(f"Unknown compaction strategy: {options.strategy}")
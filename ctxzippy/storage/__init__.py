@@ -1,8 +1,12 @@
 """Storage utilities for ctx-zip."""
 
 from .known_keys import register_known_key, is_known_key, clear_known_keys
-from .resolver import create_storage_adapter, resolve_file_uri_from_base_dir
-from .grep import grep_object, GrepResultLine
+from .resolver import (
+    create_storage_adapter,
+    resolve_file_uri_from_base_dir,
+    set_current_adapter,
+)
+from .grep import grep_object, grep_object_bytes, grep_object_raw, GrepResultLine
 
 __all__ = [
     "register_known_key",
@@ -10,6 +14,9 @@ __all__ = [
     "clear_known_keys",
     "create_storage_adapter",
     "resolve_file_uri_from_base_dir",
+    "set_current_adapter",
     "grep_object",
+    "grep_object_bytes",
+    "grep_object_raw",
     "GrepResultLine",
 ]
@@ -1,14 +1,110 @@
 """Grep/search functionality for stored content."""
 
+import functools
+import itertools
 import re
 from dataclasses import dataclass
-from typing import List, Pattern, Union
+from types import ModuleType
+from typing import Any, AnyStr, Callable, Dict, List, Optional, Pattern, Tuple, Union, cast
 import json
 
-from ..adapters.base import StorageAdapter, StorageReadParams
+from ..adapters.base import StorageAdapter, StorageReadParams, _SLOTS
 
+orjson: Optional[ModuleType]
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
-@dataclass
+try:
+    import re2 as _re2
+except ImportError:
+    _re2 = None
+
+hyperscan: Optional[ModuleType]
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
+
+# Number of streamed lines scanned per regex pass in grep_object
+_LINE_BATCH = 4096
+
+# Single-letter regex flags accepted by the grep tools
+_FLAG_MAP = {"i": re.IGNORECASE, "m": re.MULTILINE, "s": re.DOTALL}
+
+# Inline equivalents, used for re2 whose bindings disagree on flag arguments
+_INLINE_FLAGS = ((re.IGNORECASE, "i"), (re.DOTALL, "s"))
+
+# Escapes whose meaning is Unicode-aware in ``re`` but ASCII-only in re2
+_ASCII_ONLY_CLASSES = frozenset("wWdDsSbB")
+_ESCAPE_RE = re.compile(r"\\(.)", re.DOTALL)
+
+if _re2 is not None:
+    # Patterns re2 rejects fall back to ``re``; don't log each rejection to stderr
+    _RE2_OPTIONS = _re2.Options()
+    _RE2_OPTIONS.log_errors = False
+
+
+def _parse_flags(flags: Optional[str]) -> int:
+    """
+    Fold a flag string such as "im" into ``re`` flag bits; unknown letters are ignored.
+
+    Equivalent strings ("im", "mi", "iim") give the same int, so they share
+    a single entry in the compiled-pattern cache.
+    """
+    regex_flags = 0
+    for c in flags or "":
+        regex_flags |= _FLAG_MAP.get(c, 0)
+    return regex_flags
+
+
+def _re2_can_replace_re(pattern: AnyStr, flags: int) -> bool:
+    """
+    Whether compiling ``pattern`` with re2 keeps ``re``'s matching semantics.
+
+    re2's ``\\w``, ``\\d``, ``\\s`` and ``\\b`` classes (and their negations) are
+    ASCII-only, its case folding differs from ``re``'s outside ASCII, and it
+    reads ``{,n}`` as literal text rather than a 0 to n repeat.
+    """
+    text = pattern.decode("latin-1") if isinstance(pattern, bytes) else pattern
+    if "{," in text:
+        return False
+    if any(m.group(1) in _ASCII_ONLY_CLASSES for m in _ESCAPE_RE.finditer(text)):
+        return False
+    return not (flags & re.IGNORECASE and not text.isascii())
+
+
+@functools.lru_cache(maxsize=256)
+def _compile(pattern: AnyStr, flags: int = 0) -> Pattern[AnyStr]:
+    """
+    Compile a regex, caching the result by (pattern, flags).
+
+    ``re``'s internal cache is small and cleared wholesale when it fills up,
+    so repeated tool calls with the same pattern are cached here instead.
+    Invalid patterns raise ``re.error`` and are not cached.
+
+    When the ``re2`` module is installed, patterns it supports are compiled
+    with it instead, giving linear-time matching on untrusted patterns. re2
+    patterns are always multiline (which doesn't change line-based results).
+    Patterns re2 rejects, such as backreferences, and patterns it would match
+    differently, such as ``\\w`` on non-ASCII text, fall back to ``re``.
+    """
+    if _re2 is not None and _re2_can_replace_re(pattern, flags):
+        inline = "m" + "".join(c for bit, c in _INLINE_FLAGS if flags & bit)
+        prefix = f"(?{inline})"
+        try:
+            # re2 patterns duck-type the re.Pattern interface
+            if isinstance(pattern, bytes):
+                return cast(Pattern[AnyStr], _re2.compile(prefix.encode() + pattern, _RE2_OPTIONS))
+            return cast(Pattern[AnyStr], _re2.compile(prefix + pattern, _RE2_OPTIONS))
+        except Exception:
+            pass
+    return re.compile(pattern, flags)
+
+
+@dataclass(frozen=True, **_SLOTS)
 class GrepResultLine:
     """A single line matching a grep pattern."""
 
@@ -19,43 +115,215 @@ class GrepResultLine:
         return f"{self.line_number}: {self.content}"
 
 
+# Per content type: the newline; line breaks other than it, as str.splitlines
+# and bytes.splitlines see them (checked with find, which is much faster than a
+# regex search, then normalized with the regex); and whole-text anchors and
+# lookarounds, which only behave like a per-line search when run line by line
+_STR_TOKENS = (
+    "\n",
+    ("\r", "\x0b", "\x0c", "\x1c", "\x1d", "\x1e", "\x85", "\u2028", "\u2029"),
+    re.compile("\r\n?|[\x0b\x0c\x1c-\x1e\x85\u2028\u2029]"),
+    re.compile(r"\\[AZ]|\(\?<?[=!]"),
+)
+_BYTES_TOKENS = (
+    b"\n",
+    (b"\r",),
+    re.compile(b"\r\n?"),
+    re.compile(rb"\\[AZ]|\(\?<?[=!]"),
+)
+
+
+def _counter(content: Any) -> Callable[[Any, int, int], int]:
+    """Return ``content.count``, emulating it for buffers such as mmap that lack it."""
+    count = getattr(content, "count", None)
+    if count is not None:
+        return cast(Callable[[Any, int, int], int], count)
+
+    def count_slice(sub: bytes, start: int, end: int) -> int:
+        return cast(int, content[start:end].count(sub))
+
+    return count_slice
+
+
+def _scan_lines(
+    content: AnyStr, pattern: Pattern[AnyStr], max_results: int, first_line: int = 1
+) -> List[Tuple[int, AnyStr]]:
+    """
+    Find lines of ``content`` matching ``pattern`` with a single regex scan.
+
+    Instead of splitting into lines and searching each one, the pattern is run
+    over the whole text in multiline mode and each match is mapped back to its
+    line by counting the newlines skipped since the previous one. Each
+    candidate line is then confirmed with the original pattern, so matches that
+    only exist across a line break are not reported, and lines that never
+    produce a candidate cost no per-line Python work. Patterns using ``\\A``,
+    ``\\Z`` or lookarounds (which could see past the end of a line) fall back
+    to searching line by line.
+
+    Lines are split as ``splitlines`` splits them; other line breaks are
+    normalized to ``\\n`` first.
+
+    Works on str and bytes content, with a pattern of the same type. Read-only
+    byte buffers such as ``mmap`` are scanned in place; they are only copied
+    when line endings need normalizing or the pattern needs the per-line path.
+
+    Returns:
+        (line_number, line) pairs for the matching lines
+    """
+    nl, break_chars, breaks, per_line_syntax = (
+        _STR_TOKENS if isinstance(content, str) else _BYTES_TOKENS
+    )
+    source = getattr(pattern, "pattern", None)
+    per_line = isinstance(source, type(nl)) and per_line_syntax.search(source) is not None
+    normalize = any(content.find(c) != -1 for c in break_chars)
+
+    if normalize or per_line:
+        if not isinstance(content, (str, bytes)):
+            content = content[:]
+        if normalize:
+            content = breaks.sub(nl, content)
+
+    if per_line:
+        # Whole-text anchors can't be emulated by a single scan; search per line
+        lines = content.split(nl)
+        if not lines[-1]:
+            # Empty remainder after a trailing newline is not a line
+            lines.pop()
+        results: List[Tuple[int, AnyStr]] = []
+        for i, line in enumerate(lines, start=first_line):
+            if pattern.search(line):
+                results.append((i, line))
+                if len(results) >= max_results:
+                    break
+        return results
+
+    scan = pattern
+    if isinstance(pattern, re.Pattern) and not pattern.flags & re.MULTILINE:
+        scan = _compile(pattern.pattern, pattern.flags | re.MULTILINE)
+
+    count = _counter(content)
+    text_end = len(content)
+    results = []
+    pos = 0
+    line_number = first_line
+
+    while pos <= text_end and len(results) < max_results:
+        match = scan.search(content, pos)
+        if match is None:
+            break
+
+        line_start = content.rfind(nl, pos, match.start()) + 1 or pos
+        if line_start == text_end:
+            # Empty remainder after a trailing newline is not a line
+            break
+        line_end = content.find(nl, match.start())
+        if line_end == -1:
+            line_end = text_end
+        line_number += count(nl, pos, line_start)
+        line = content[line_start:line_end]
+
+        if pattern.search(line):
+            results.append((line_number, line))
+
+        # Continue from the next line so each line is reported at most once
+        pos = line_end + 1
+        line_number += 1
+
+    return results
+
+
+def _grep_lines(
+    content: str, pattern: Pattern[str], max_results: int, first_line: int = 1
+) -> List[GrepResultLine]:
+    """Run :func:`_scan_lines` over text and wrap the matches as GrepResultLine."""
+    return [
+        GrepResultLine(line_number=i, content=line)
+        for i, line in _scan_lines(content, pattern, max_results, first_line)
+    ]
+
+
 def grep_object(
     adapter: StorageAdapter, key: str, pattern: Pattern[str], max_results: int = 100
 ) -> List[GrepResultLine]:
     """
     Search for a pattern in stored content.
 
+    When the adapter provides ``iter_lines``, content is streamed and scanned
+    in batches, and reading stops once ``max_results`` matches are found.
+    Single-line JSON is pretty-printed first so matches land on separate lines.
+
     Args:
         adapter: The storage adapter to read from
         key: The storage key to search
-        pattern: Compiled regex pattern to search for
+        pattern: Compiled regex pattern to search for. Patterns from other
+            engines (e.g. re2) are accepted if they provide ``search(text, pos)``
+            and were compiled in multiline mode.
         max_results: Maximum number of matches to return
 
     Returns:
         List of matching lines with line numbers
     """
-    results = []
+    return [
+        GrepResultLine(line_number=i, content=line)
+        for i, line in _search_object(adapter, key, pattern, max_results)
+    ]
+
+
+def grep_object_raw(
+    adapter: StorageAdapter, key: str, pattern: Pattern[str], max_results: int = 100
+) -> List[Dict[str, Any]]:
+    """
+    Search for a pattern in stored content, returning plain dicts.
+
+    Same search as :func:`grep_object`, but each match is built directly as
+    ``{"line_number": ..., "content": ...}``, the shape the grep tool returns,
+    without creating GrepResultLine objects first.
+    """
+    return [
+        {"line_number": i, "content": line}
+        for i, line in _search_object(adapter, key, pattern, max_results)
+    ]
+
+
+def _search_object(
+    adapter: StorageAdapter, key: str, pattern: Pattern[str], max_results: int
+) -> List[Tuple[int, str]]:
+    """Read or stream a stored object and return its matching (line_number, line) pairs."""
+    results: List[Tuple[int, str]] = []
+    params = StorageReadParams(key=key)
 
     try:
-        # Read the content
-        content = adapter.read_text(StorageReadParams(key=key))
+        iter_lines = getattr(adapter, "iter_lines", None)
+        if iter_lines is None:
+            content = adapter.read_text(params)
+            if "\n" not in content:
+                content = _reformat_json(content)
+            return _scan_lines(content, pattern, max_results)
 
-        # Try to parse as JSON first for better structured search
+        # Stream the content and scan it in batches of lines, so reading stops
+        # as soon as max_results matches have been found
+        lines = iter_lines(params)
         try:
-            obj = json.loads(content)
-            # Convert back to pretty-printed JSON for line-based search
-            content = json.dumps(obj, indent=2)
-        except (json.JSONDecodeError, TypeError):
-            # Not JSON, use as-is
-            pass
+            batch = list(itertools.islice(lines, _LINE_BATCH))
+            if len(batch) == 1:
+                return _scan_lines(_reformat_json(batch[0]), pattern, max_results)
 
-        # Split into lines and search
-        lines = content.splitlines()
-        for i, line in enumerate(lines, start=1):
-            if pattern.search(line):
-                results.append(GrepResultLine(line_number=i, content=line))
-                if len(results) >= max_results:
-                    break
+            first_line = 1
+            while batch and len(results) < max_results:
+                results.extend(
+                    _scan_lines(
+                        "\n".join(batch) + "\n",
+                        pattern,
+                        max_results - len(results),
+                        first_line,
+                    )
+                )
+                first_line += len(batch)
+                batch = list(itertools.islice(lines, _LINE_BATCH))
+        finally:
+            close = getattr(lines, "close", None)
+            if close is not None:
+                close()
 
     except Exception as e:
         # Return empty results on error
@@ -64,6 +332,208 @@ def grep_object(
     return results
 
 
+def _reformat_json(content: str) -> str:
+    """
+    Pretty-print single-line JSON so that line-based search is useful.
+
+    Content that already spans multiple lines is searched as stored; anything
+    that isn't valid JSON is returned unchanged. Only objects and arrays are
+    worth reformatting, so other content is not parsed at all.
+    """
+    if content.lstrip()[:1] not in ("{", "["):
+        return content
+
+    if orjson is not None:
+        try:
+            data: bytes = orjson.dumps(orjson.loads(content), option=orjson.OPT_INDENT_2)
+            return data.decode()
+        except (orjson.JSONDecodeError, TypeError):
+            # Let the stdlib handle what orjson rejects (NaN, huge integers)
+            pass
+
+    try:
+        obj = json.loads(content)
+        # Convert back to pretty-printed JSON for line-based search
+        return json.dumps(obj, indent=2)
+    except (json.JSONDecodeError, TypeError):
+        # Not JSON, use as-is
+        return content
+
+
+def grep_object_bytes(
+    adapter: StorageAdapter,
+    key: str,
+    pattern: Union[Pattern[bytes], Pattern[str]],
+    max_results: int = 100,
+) -> List[GrepResultLine]:
+    """
+    Search for a pattern in stored content without decoding it first.
+
+    The raw bytes are scanned with a bytes pattern and only matching lines are
+    decoded, which avoids a full-size str copy of large ASCII-heavy content
+    (logs, JSON). A str pattern is converted to its bytes equivalent; note
+    that bytes patterns use ASCII semantics for ``\\w``, ``\\s`` and
+    case-insensitive matching.
+
+    Args:
+        adapter: The storage adapter to read from
+        key: The storage key to search
+        pattern: Compiled regex pattern (bytes or str) to search for
+        max_results: Maximum number of matches to return
+
+    Returns:
+        List of matching lines with line numbers
+    """
+    bytes_pattern: Pattern[bytes]
+    if isinstance(pattern.pattern, str):
+        bytes_pattern = _compile(pattern.pattern.encode("utf-8"), pattern.flags & ~re.UNICODE)
+    else:
+        bytes_pattern = pattern
+
+    params = StorageReadParams(key=key)
+
+    try:
+        read_mmap = getattr(adapter, "read_mmap", None)
+        if read_mmap is not None:
+            try:
+                mapped = read_mmap(params)
+            except ValueError:
+                # Empty files cannot be mapped
+                return []
+            try:
+                # Multi-line content is scanned straight from the page cache
+                if mapped.find(b"\n") != -1:
+                    return _decode_lines(_scan_bytes(mapped, bytes_pattern, max_results))
+                content = mapped[:]
+            finally:
+                mapped.close()
+        elif hasattr(adapter, "read_bytes"):
+            content = adapter.read_bytes(params)
+        else:
+            stream = adapter.open_read_stream(params)
+            try:
+                content = stream.read()
+            finally:
+                stream.close()
+
+        if b"\n" not in content and content.lstrip()[:1] in (b"{", b"["):
+            content = _reformat_json(content.decode("utf-8")).encode("utf-8")
+
+        return _decode_lines(_scan_bytes(content, bytes_pattern, max_results))
+    except Exception:
+        # Return empty results on error, like grep_object
+        return []
+
+
+def _scan_bytes(
+    content: Any, pattern: Pattern[bytes], max_results: int
+) -> List[Tuple[int, bytes]]:
+    """Scan bytes content, letting Hyperscan find candidate lines when it is installed."""
+    if (
+        hyperscan is not None
+        and isinstance(pattern, re.Pattern)
+        and content.find(b"\r") == -1
+        and not _BYTES_TOKENS[3].search(pattern.pattern)
+        # Hyperscan reads {,n} as literal text, where re reads a 0 to n repeat
+        and b"{," not in pattern.pattern
+    ):
+        results = _scan_lines_hyperscan(content, pattern, max_results)
+        if results is not None:
+            return results
+    return _scan_lines(content, pattern, max_results)
+
+
+@functools.lru_cache(maxsize=64)
+def _hyperscan_database(pattern: bytes, flags: int) -> Optional[Any]:
+    """Compile a bytes pattern into a Hyperscan database, or None if it can't be."""
+    if hyperscan is None:
+        return None
+
+    hs_flags = hyperscan.HS_FLAG_MULTILINE | hyperscan.HS_FLAG_ALLOWEMPTY
+    if flags & re.IGNORECASE:
+        hs_flags |= hyperscan.HS_FLAG_CASELESS
+    if flags & re.DOTALL:
+        hs_flags |= hyperscan.HS_FLAG_DOTALL
+
+    db = hyperscan.Database()
+    try:
+        db.compile(expressions=[pattern], ids=[0], elements=1, flags=[hs_flags])
+    except Exception:
+        # Unsupported syntax (backreferences, lookarounds, ...)
+        return None
+    return db
+
+
+def _scan_lines_hyperscan(
+    content: Any, pattern: Pattern[bytes], max_results: int
+) -> Optional[List[Tuple[int, bytes]]]:
+    """
+    Find matching lines using Hyperscan to locate candidates.
+
+    Hyperscan reports every match end offset in a single vectorized pass; the
+    lines around those offsets are then confirmed with ``pattern`` itself, so
+    results are the same as :func:`_scan_lines`. Scanning halts once
+    ``max_results`` lines have matched.
+
+    Returns:
+        (line_number, line) pairs, or None if Hyperscan can't handle the
+        pattern or content and the caller should fall back to ``re``
+    """
+    db = _hyperscan_database(pattern.pattern, pattern.flags)
+    if db is None:
+        return None
+
+    count = _counter(content)
+    text_end = len(content)
+    results: List[Tuple[int, bytes]] = []
+    line_start = 0
+    line_number = 1
+    checked_start = -1
+    halted = False
+
+    def on_match(_id: int, _from: int, to: int, _flags: int, _context: Any) -> bool:
+        nonlocal line_start, line_number, checked_start, halted
+        # A match ending at `to` lies on the line holding its last byte, or on
+        # the line starting at `to` when it is empty; both are checked
+        for offset in (to - 1, to):
+            if offset < line_start:
+                continue
+            start = content.rfind(b"\n", line_start, offset) + 1 or line_start
+            if start == text_end:
+                # Empty remainder after a trailing newline is not a line
+                continue
+            line_number += count(b"\n", line_start, start)
+            line_start = start
+            if start == checked_start:
+                continue
+            checked_start = start
+
+            end = content.find(b"\n", start)
+            line = content[start:text_end if end == -1 else end]
+            if pattern.search(line):
+                results.append((line_number, line))
+                if len(results) >= max_results:
+                    halted = True
+                    return True
+        return False
+
+    try:
+        db.scan(content, match_event_handler=on_match)
+    except Exception:
+        # Halting from the callback is reported as an error by some versions
+        if not halted:
+            return None
+    return results
+
+
+def _decode_lines(lines: List[Tuple[int, bytes]]) -> List[GrepResultLine]:
+    """Decode matched byte lines into GrepResultLine entries."""
+    return [
+        GrepResultLine(line_number=i, content=line.decode("utf-8", errors="replace"))
+        for i, line in lines
+    ]
+
+
 def grep_text(
     text: str, pattern: Union[str, Pattern[str]], flags: str = "", max_results: int = 100
 ) -> List[GrepResultLine]:
@@ -81,22 +551,6 @@ def grep_text(
     """
     # Compile pattern if needed
     if isinstance(pattern, str):
-        regex_flags = 0
-        if "i" in flags:
-            regex_flags |= re.IGNORECASE
-        if "m" in flags:
-            regex_flags |= re.MULTILINE
-        if "s" in flags:
-            regex_flags |= re.DOTALL
-        pattern = re.compile(pattern, regex_flags)
-
-    results = []
-    lines = text.splitlines()
-
-    for i, line in enumerate(lines, start=1):
-        if pattern.search(line):
-            results.append(GrepResultLine(line_number=i, content=line))
-            if len(results) >= max_results:
-                break
+        pattern = _compile(pattern, _parse_flags(flags))
 
-    return results
+    return _grep_lines(text, pattern, max_results)
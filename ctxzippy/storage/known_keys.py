@@ -1,9 +1,12 @@
 """Track known storage keys for validation in reader tools."""
 
+import sys
 from typing import Set, Tuple
 
-# Global registry of (storage_uri, key) pairs that have been written
-_known_keys: Set[Tuple[str, str]] = set()
+# Global registry of (storage URI, key) pairs that have been written. A single
+# set means one hash lookup per check, and individual set operations are
+# atomic, so neither registrations nor lookups need a lock.
+_known: Set[Tuple[str, str]] = set()
 
 
 def register_known_key(storage_uri: str, key: str) -> None:
@@ -17,7 +20,8 @@ def register_known_key(storage_uri: str, key: str) -> None:
         storage_uri: The storage adapter's URI representation
         key: The storage key that was written
     """
-    _known_keys.add((storage_uri, key))
+    # Storage URIs repeat across many keys; intern them so entries share one copy
+    _known.add((sys.intern(storage_uri), key))
 
 
 def is_known_key(storage_uri: str, key: str) -> bool:
@@ -31,9 +35,9 @@ def is_known_key(storage_uri: str, key: str) -> bool:
     Returns:
         True if the key has been registered, False otherwise
     """
-    return (storage_uri, key) in _known_keys
+    return (storage_uri, key) in _known
 
 
 def clear_known_keys() -> None:
     """Clear all known keys. Useful for testing."""
-    _known_keys.clear()
+    _known.clear()
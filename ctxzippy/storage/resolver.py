@@ -1,13 +1,20 @@
 """Storage adapter resolution and creation utilities."""
 
+import contextlib
+import functools
 import os
+from contextvars import ContextVar
 from pathlib import Path
-from typing import Optional, Union
-from urllib.parse import urlparse
+from typing import Iterator, Optional, Union
 
 from ..adapters.base import StorageAdapter
 from ..adapters.filesystem import FileStorageAdapter, file_uri_to_options
 
+# Adapter used when no storage is given, scoped to the current thread or task
+_current_adapter: "ContextVar[Optional[StorageAdapter]]" = ContextVar(
+    "ctxzippy_current_adapter", default=None
+)
+
 
 def create_storage_adapter(
     uri_or_adapter: Optional[Union[str, StorageAdapter]] = None
@@ -15,11 +22,14 @@ def create_storage_adapter(
     """
     Create or return a storage adapter from a URI string or adapter instance.
 
+    Adapters created from URI strings are cached and reused for the same URI.
+
     Args:
         uri_or_adapter: Either:
             - A URI string (e.g., "file:///path", "s3://bucket/prefix")
             - An existing StorageAdapter instance
-            - None (defaults to a temp directory adapter)
+            - None (the adapter set with set_current_adapter, if any, otherwise a
+              temp directory adapter shared by the process)
 
     Returns:
         A StorageAdapter instance
@@ -31,21 +41,66 @@ def create_storage_adapter(
     if uri_or_adapter is not None and hasattr(uri_or_adapter, "write"):
         return uri_or_adapter
 
-    # If no URI provided, create default temp directory adapter
+    # If no URI provided, use the current adapter or the process-wide temp directory one
     if uri_or_adapter is None:
-        import tempfile
+        return _current_adapter.get() or _default_adapter()
+
+    return _adapter_for_uri(str(uri_or_adapter))
+
+
+@contextlib.contextmanager
+def set_current_adapter(adapter: StorageAdapter) -> Iterator[StorageAdapter]:
+    """
+    Make an adapter the default storage for the enclosed block.
+
+    While active, compaction and the reader tools use this adapter whenever no
+    storage is configured. The setting is held in a context variable, so it is
+    local to the current thread or asyncio task and restored on exit.
+
+    Args:
+        adapter: The adapter to use as the default storage
+
+    Example:
+        >>> with set_current_adapter(FileStorageAdapter(base_dir="/tmp/ctx")):
+        ...     compacted = compact_messages_sync(messages)
+    """
+    token = _current_adapter.set(adapter)
+    try:
+        yield adapter
+    finally:
+        _current_adapter.reset(token)
+
+
+@functools.lru_cache(maxsize=None)
+def _default_adapter() -> StorageAdapter:
+    """
+    Create the default adapter, backed by a temp directory shared by the process.
+
+    Reusing one directory avoids leaking a new temp directory per call, and
+    lets the reader tools find content compacted without explicit storage.
+    """
+    import tempfile
+
+    return FileStorageAdapter(base_dir=tempfile.mkdtemp(prefix="ctxzippy_"))
 
-        temp_dir = tempfile.mkdtemp(prefix="ctxzippy_")
-        return FileStorageAdapter(base_dir=temp_dir)
 
-    # Parse URI and create appropriate adapter
-    uri = str(uri_or_adapter)
-    parsed = urlparse(uri)
+@functools.lru_cache(maxsize=32)
+def _adapter_for_uri(uri: str) -> StorageAdapter:
+    """
+    Create the storage adapter for a URI string.
+
+    Adapters are cached per URI string, on the assumption that a URI always
+    maps to the same (effectively immutable) adapter configuration. This saves
+    repeated path resolution, directory creation and client setup when many
+    conversations are compacted against the same storage.
+    """
+    # Dispatch on the URI scheme and create the appropriate adapter
+    scheme = uri.partition(":")[0].lower() if ":" in uri else ""
 
-    if parsed.scheme == "file":
+    if scheme == "file":
         options = file_uri_to_options(uri)
         return FileStorageAdapter(**options)
-    elif parsed.scheme == "s3":
+    elif scheme == "s3":
         try:
             from ..adapters.s3 import S3StorageAdapter, s3_uri_to_options
             options = s3_uri_to_options(uri)
@@ -54,14 +109,14 @@ def create_storage_adapter(
             raise ImportError(
                 "S3 storage requires boto3. Install with: pip install ctxzippy[s3]"
             )
-    elif parsed.scheme == "blob":
+    elif scheme == "blob":
         # Placeholder for future blob adapters
         raise NotImplementedError(
-            f"Storage adapter for '{parsed.scheme}' not yet implemented. "
+            f"Storage adapter for '{scheme}' not yet implemented. "
             f"Currently only 'file://' URIs are supported."
         )
     else:
-        raise ValueError(f"Unsupported storage URI scheme: {parsed.scheme}")
+        raise ValueError(f"Unsupported storage URI scheme: {scheme}")
 
 
 def resolve_file_uri_from_base_dir(base_dir: Union[str, Path]) -> str:
@@ -2,18 +2,22 @@
 
 from .write_tool_results import (
     write_tool_results_to_storage_strategy,
+    write_tool_results_to_storage_strategy_sync,
     detect_window_start,
     detect_window_range,
     message_has_text_content,
+    default_serialize_result,
     Boundary,
     WriteToolResultsToStorageOptions,
 )
 
 __all__ = [
     "write_tool_results_to_storage_strategy",
+    "write_tool_results_to_storage_strategy_sync",
     "detect_window_start",
     "detect_window_range",
     "message_has_text_content",
+    "default_serialize_result",
     "Boundary",
     "WriteToolResultsToStorageOptions",
 ]
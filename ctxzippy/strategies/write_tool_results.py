@@ -1,13 +1,24 @@
 """Strategy for writing tool results to storage during compaction."""
 
+import asyncio
+import io
 import json
 import uuid
-from typing import List, Dict, Any, Optional, Union, Callable, Tuple
+from pathlib import Path
+from types import ModuleType
+from typing import List, Dict, Any, Optional, Union, Callable, Tuple, IO, FrozenSet, cast
 from dataclasses import dataclass
 
-from ..adapters.base import StorageAdapter, StorageWriteParams
+from ..adapters.base import StorageAdapter, StorageWriteParams, SupportsWriteStream
 from ..storage.known_keys import register_known_key
 
+# Optional fast JSON encoder - falls back to the stdlib if not installed
+orjson: Optional[ModuleType]
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 # Type alias for message dictionaries
 Message = Dict[str, Any]
@@ -19,21 +30,80 @@ Boundary = Union[
 ]
 
 
+# Reader tools whose results are references to storage, not payloads to persist
+DEFAULT_STORAGE_READER_TOOL_NAMES: Tuple[str, ...] = ("readFile", "grepAndSearchFile")
+
+# Roles whose text messages mark a conversational boundary
+_BOUNDARY_ROLES = frozenset(("assistant", "user"))
+
+
+def default_serialize_result(value: Any) -> str:
+    """Serialize a tool output as JSON with 2-space indentation."""
+    if orjson is not None:
+        try:
+            data: bytes = orjson.dumps(
+                value, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+            )
+            return data.decode("utf-8")
+        except orjson.JSONEncodeError:
+            # e.g. integers wider than 64 bits, which the stdlib encoder handles
+            pass
+    return json.dumps(value, indent=2)
+
+
+def _dump_json_to_stream(value: Any, stream: IO[bytes]) -> None:
+    """
+    Write a tool output to a binary stream exactly as default_serialize_result
+    would serialize it, without materializing the serialized string.
+    """
+    if orjson is not None:
+        # orjson encodes straight to UTF-8 bytes, skipping the str round-trip. It
+        # fails before anything is written, so the stdlib fallback starts clean.
+        try:
+            data = orjson.dumps(value, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+        except orjson.JSONEncodeError:
+            pass
+        else:
+            stream.write(data)
+            return
+
+    # The stdlib encoder emits chunks as it goes; detach so the caller owns the stream
+    text = io.TextIOWrapper(stream, encoding="utf-8")
+    json.dump(value, text, indent=2)
+    text.detach()
+
+
+class _StreamedJson:
+    """A JSON tool output to be serialized directly into a storage write stream."""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any):
+        self.value = value
+
+
+class _FileSource:
+    """A tool output that already lives in a local file and is copied to storage."""
+
+    __slots__ = ("path",)
+
+    def __init__(self, path: str):
+        self.path = path
+
+
 def format_storage_path_for_display(storage_uri: str, key: str) -> str:
     """Format a storage URI and key for display."""
     if not storage_uri:
         return key
 
-    if storage_uri.startswith("blob:"):
+    scheme, _, rest = storage_uri.partition(":")
+    if scheme == "blob":
         # blob root => blob:///<key>
-        if storage_uri in ("blob:", "blob:/"):
+        if rest in ("", "/"):
             return f"blob:///{key}"
         # blob with prefix => blob://prefix/<key>
-        if storage_uri.startswith("blob://"):
-            base = storage_uri.rstrip("/")
-            return f"{base}/{key}"
-        # Fallback
-        return f"{storage_uri}:{key}"
+        if rest.startswith("//"):
+            return f"{storage_uri.rstrip('/')}/{key}"
 
     # Default formatting uses colon separation
     return f"{storage_uri}:{key}"
@@ -55,25 +125,21 @@ def message_has_text_content(message: Optional[Message]) -> bool:
 
     # Array of content parts
     if isinstance(content, list):
-        return any(
-            part.get("type") == "text" and isinstance(part.get("text"), str)
-            for part in content
-            if isinstance(part, dict)
-        )
+        for part in content:
+            if (
+                isinstance(part, dict)
+                and part.get("type") == "text"
+                and isinstance(part.get("text"), str)
+            ):
+                return True
 
     return False
 
 
-def detect_window_start(messages: List[Message], boundary: Boundary) -> int:
+def _fixed_window_start(messages: List[Message], boundary: Boundary) -> Optional[int]:
     """
-    Determine the starting index of the compaction window based on the chosen boundary.
-
-    Args:
-        messages: List of message dictionaries
-        boundary: The boundary configuration
-
-    Returns:
-        The starting index for compaction
+    Return the window start for boundaries that don't depend on message content,
+    or None when the start must be found by scanning for the last text message.
     """
     # Handle first-n-messages boundary
     if isinstance(boundary, dict) and boundary.get("type") == "first-n-messages":
@@ -88,14 +154,31 @@ def detect_window_start(messages: List[Message], boundary: Boundary) -> int:
     if boundary == "entire-conversation":
         return 0
 
+    return None
+
+
+def detect_window_start(messages: List[Message], boundary: Boundary) -> int:
+    """
+    Determine the starting index of the compaction window based on the chosen boundary.
+
+    Args:
+        messages: List of message dictionaries
+        boundary: The boundary configuration
+
+    Returns:
+        The starting index for compaction
+    """
+    fixed_start = _fixed_window_start(messages, boundary)
+    if fixed_start is not None:
+        return fixed_start
+
     # Default: since-last-assistant-or-user-text
+    # Scan backwards and stop at the first boundary; the role check is cheap, so
+    # content parts are only inspected for assistant/user messages.
     window_start = 0
     for i in range(len(messages) - 2, -1, -1):
         msg = messages[i]
-        is_boundary = (
-            msg and msg.get("role") in ("assistant", "user") and message_has_text_content(msg)
-        )
-        if is_boundary:
+        if msg and msg.get("role") in _BOUNDARY_ROLES and message_has_text_content(msg):
             window_start = i + 1
             break
 
@@ -125,6 +208,39 @@ def is_tool_message(msg: Message) -> bool:
     return msg and msg.get("role") == "tool" and isinstance(msg.get("content"), list)
 
 
+def _window_tool_messages(messages: List[Message], boundary: Boundary) -> List[Message]:
+    """
+    Collect the tool messages in the compaction window, in order.
+
+    Equivalent to filtering detect_window_range's window with is_tool_message,
+    but each message is visited at most once: for the default boundary the
+    backward scan for the last text message collects tool messages as it goes
+    instead of walking the window a second time.
+    """
+    end_exclusive = len(messages) - 1
+
+    tool_messages = []
+
+    start = _fixed_window_start(messages, boundary)
+    if start is not None:
+        for i in range(start, end_exclusive):
+            msg = messages[i]
+            if is_tool_message(msg):
+                tool_messages.append(msg)
+        return tool_messages
+
+    for i in range(end_exclusive - 1, -1, -1):
+        msg = messages[i]
+        if not msg:
+            continue
+        if msg.get("role") in _BOUNDARY_ROLES and message_has_text_content(msg):
+            break
+        if is_tool_message(msg):
+            tool_messages.append(msg)
+    tool_messages.reverse()
+    return tool_messages
+
+
 @dataclass
 class WriteToolResultsToStorageOptions:
     """Options for the write-tool-results-to-storage compaction strategy."""
@@ -133,28 +249,67 @@ class WriteToolResultsToStorageOptions:
     adapter: StorageAdapter
     serialize_result: Callable[[Any], str]
     storage_reader_tool_names: Optional[List[str]] = None
+    reader_set: Optional[FrozenSet[str]] = None
+    """Prebuilt lookup set of reader tool names; takes precedence over the list."""
+    stream_json_results: bool = False
+    """
+    Serialize JSON outputs directly into the adapter's write stream instead of
+    building the serialized string first. Only valid when serialize_result is
+    default_serialize_result; ignored for adapters without open_write_stream.
+    """
+    in_place: bool = False
+    """Operate on the given message list directly instead of a shallow copy."""
+    persist_file_outputs: bool = False
+    """
+    Persist outputs of the form {"type": "file", "path": ...} by copying the
+    referenced local file into storage.
+    """
 
 
-async def write_tool_results_to_storage_strategy(
+# Content to persist: serialized text, or a JSON value or local file written as-is
+_WriteBody = Union[str, _StreamedJson, _FileSource]
+
+# A pending write: (tool-result part to rewrite, storage key, content to persist)
+_WriteJob = Tuple[Dict[str, Any], str, _WriteBody]
+
+
+def _persist(adapter: StorageAdapter, key: str, body: _WriteBody) -> None:
+    """Write a single pending payload to storage."""
+    if isinstance(body, _FileSource):
+        write_from_path = getattr(adapter, "write_from_path", None)
+        if write_from_path is not None:
+            write_from_path(body.path, key)
+        else:
+            adapter.write(StorageWriteParams(key=key, body=Path(body.path).read_bytes()))
+    elif isinstance(body, _StreamedJson):
+        # _StreamedJson is only queued for adapters that support write streams
+        stream_adapter = cast(SupportsWriteStream, adapter)
+        with stream_adapter.open_write_stream(key, content_type="text/plain") as stream:
+            _dump_json_to_stream(body.value, stream)
+    else:
+        adapter.write(StorageWriteParams(key=key, body=body, content_type="text/plain"))
+
+
+def _plan_tool_result_writes(
     messages: List[Message], options: WriteToolResultsToStorageOptions
-) -> List[Message]:
+) -> Tuple[List[Message], List[_WriteJob]]:
     """
-    Compaction strategy that writes tool-result payloads to storage and replaces
-    their in-line content with a concise reference to the persisted location.
-
-    Args:
-        messages: List of message dictionaries to compact
-        options: Configuration options for the strategy
+    Walk the compaction window, rewriting storage reader tool results in place
+    and collecting the tool-result parts whose payloads need to be persisted.
 
     Returns:
-        Modified list of messages with tool results replaced by references
+        Tuple of (message list, pending writes)
     """
-    # Make a copy of messages to avoid mutation
-    msgs = list(messages) if messages else []
+    # Copy the outer list unless the caller opted into in-place compaction
+    # (tool-result parts are rewritten in place either way)
+    if options.in_place:
+        msgs = messages if messages is not None else []
+    else:
+        msgs = list(messages) if messages else []
 
     # Check if ends with assistant text message
     if not msgs:
-        return msgs
+        return msgs, []
 
     last_message = msgs[-1]
     ends_with_assistant_text = (
@@ -164,23 +319,32 @@ async def write_tool_results_to_storage_strategy(
     )
 
     if not ends_with_assistant_text:
-        return msgs
-
-    # Determine compaction window
-    window_start, end_exclusive = detect_window_range(msgs, options.boundary)
-
-    # Process messages in the window
-    for i in range(window_start, min(end_exclusive, len(msgs))):
-        msg = msgs[i]
+        return msgs, []
 
-        if not is_tool_message(msg):
-            continue
-
-        content = msg.get("content", [])
-        if not isinstance(content, list):
-            continue
+    # Only tool messages in the window can carry results; bail out early when there are none
+    tool_messages = _window_tool_messages(msgs, options.boundary)
+    if not tool_messages:
+        return msgs, []
 
-        for part in content:
+    # Invariants for the whole invocation
+    storage_reader_set = options.reader_set or frozenset(
+        options.storage_reader_tool_names or DEFAULT_STORAGE_READER_TOOL_NAMES
+    )
+    serialize_result = options.serialize_result
+    stream_json = options.stream_json_results and hasattr(options.adapter, "open_write_stream")
+    persist_files = options.persist_file_outputs
+
+    # Parts to persist, collected so their writes can be dispatched together
+    jobs: List[_WriteJob] = []
+    # Reader-tool references already formatted (and registered) in this call
+    reader_displays: Dict[Tuple[str, str], str] = {}
+    # Serialized JSON values by identity. The messages hold every value for the
+    # whole call, so an id can't be reused by another object in the meantime.
+    serialized: Dict[int, str] = {}
+
+    # Process tool messages in the window
+    for msg in tool_messages:
+        for part in msg["content"]:
             if not isinstance(part, dict):
                 continue
 
@@ -188,12 +352,6 @@ async def write_tool_results_to_storage_strategy(
                 continue
 
             # Handle storage reader tools specially
-            storage_reader_names = options.storage_reader_tool_names or [
-                "readFile",
-                "grepAndSearchFile",
-            ]
-            storage_reader_set = set(storage_reader_names)
-
             tool_name = part.get("toolName")
             if tool_name and tool_name in storage_reader_set:
                 # Extract metadata from reader tool output
@@ -214,10 +372,13 @@ async def write_tool_results_to_storage_strategy(
                         key = output.get("key")
                         storage = output.get("storage")
 
-                # Create reference display
+                # Create reference display (reader tools often re-read the same key)
                 if storage and key:
-                    display = f"Read from storage: {format_storage_path_for_display(storage, key)}. Key: {key}"
-                    register_known_key(storage, key)
+                    display = reader_displays.get((storage, key))
+                    if display is None:
+                        display = f"Read from storage: {format_storage_path_for_display(storage, key)}. Key: {key}"
+                        reader_displays[(storage, key)] = display
+                        register_known_key(storage, key)
                 else:
                     display = f"Read from file: {file_name or '<unknown>'}"
 
@@ -226,42 +387,108 @@ async def write_tool_results_to_storage_strategy(
 
             # Extract content to persist
             output = part["output"]
-            content_to_persist = None
+            content_to_persist: Optional[_WriteBody] = None
 
             if isinstance(output, dict):
                 if output.get("type") == "json" and "value" in output:
                     value = output["value"]
-                    content_to_persist = (
-                        value if isinstance(value, str) else options.serialize_result(value)
-                    )
+                    if isinstance(value, str):
+                        content_to_persist = value
+                    elif stream_json:
+                        content_to_persist = _StreamedJson(value)
+                    else:
+                        content_to_persist = serialized.get(id(value))
+                        if content_to_persist is None:
+                            content_to_persist = serialize_result(value)
+                            serialized[id(value)] = content_to_persist
                 elif output.get("type") == "text" and "text" in output:
                     content_to_persist = output["text"]
+                elif persist_files and output.get("type") == "file" and output.get("path"):
+                    content_to_persist = _FileSource(output["path"])
 
             if not content_to_persist:
                 continue
 
-            # Write to storage
-            file_name = f"{uuid.uuid4()}.txt"
+            # Queue the write; storage I/O is dispatched by the caller
+            file_name = f"{uuid.uuid4().hex}.txt"
             key = options.adapter.resolve_key(file_name)
+            jobs.append((part, key, content_to_persist))
 
-            # Synchronous write (adapter should handle async internally if needed)
-            result = options.adapter.write(
-                StorageWriteParams(key=key, body=content_to_persist, content_type="text/plain")
-            )
+    return msgs, jobs
 
-            # Replace with reference
-            adapter_uri = str(options.adapter)
-            is_file = adapter_uri.startswith("file:")
-            written_prefix = "Written to file" if is_file else "Written to storage"
 
-            part["output"] = {
-                "type": "text",
-                "value": (
-                    f"{written_prefix}: {format_storage_path_for_display(adapter_uri, key)}. "
-                    f"Key: {key}. Use the read/search tools to inspect its contents."
-                ),
-            }
+def _apply_tool_result_writes(
+    jobs: List[_WriteJob], options: WriteToolResultsToStorageOptions
+) -> None:
+    """Replace each persisted part with a reference and register its key."""
+    adapter_uri = str(options.adapter)
+    is_file = adapter_uri.startswith("file:")
+    written_prefix = "Written to file" if is_file else "Written to storage"
+
+    # The display path is always a fixed prefix followed by the key, so build
+    # the invariant head of the reference once
+    head = f"{written_prefix}: {format_storage_path_for_display(adapter_uri, '')}"
+
+    for part, key, _ in jobs:
+        part["output"] = {
+            "type": "text",
+            "value": f"{head}{key}. Key: {key}. Use the read/search tools to inspect its contents.",
+        }
+
+        register_known_key(adapter_uri, key)
+
+
+async def write_tool_results_to_storage_strategy(
+    messages: List[Message], options: WriteToolResultsToStorageOptions
+) -> List[Message]:
+    """
+    Compaction strategy that writes tool-result payloads to storage and replaces
+    their in-line content with a concise reference to the persisted location.
+
+    Args:
+        messages: List of message dictionaries to compact
+        options: Configuration options for the strategy
+
+    Returns:
+        Modified list of messages with tool results replaced by references
+    """
+    msgs, jobs = _plan_tool_result_writes(messages, options)
+    if not jobs:
+        return msgs
+
+    # Run the (synchronous) adapter writes concurrently in the default executor
+    loop = asyncio.get_running_loop()
+    await asyncio.gather(
+        *(
+            loop.run_in_executor(None, _persist, options.adapter, key, body)
+            for _, key, body in jobs
+        )
+    )
+
+    _apply_tool_result_writes(jobs, options)
+    return msgs
+
+
+def write_tool_results_to_storage_strategy_sync(
+    messages: List[Message], options: WriteToolResultsToStorageOptions
+) -> List[Message]:
+    """
+    Synchronous version of write_tool_results_to_storage_strategy.
+
+    Writes are issued one after another on the calling thread, so no event
+    loop is needed.
+
+    Args:
+        messages: List of message dictionaries to compact
+        options: Configuration options for the strategy
+
+    Returns:
+        Modified list of messages with tool results replaced by references
+    """
+    msgs, jobs = _plan_tool_result_writes(messages, options)
 
-            register_known_key(adapter_uri, key)
+    for _, key, body in jobs:
+        _persist(options.adapter, key, body)
 
+    _apply_tool_result_writes(jobs, options)
     return msgs
@@ -1,11 +1,12 @@
 """Reader tools for ctx-zip."""
 
 from .reader import read_file, ReadFileOptions
-from .grep import grep_and_search_file, GrepAndSearchFileOptions
+from .grep import grep_and_search_file, grep_and_search_files_async, GrepAndSearchFileOptions
 
 __all__ = [
     "read_file",
     "ReadFileOptions",
     "grep_and_search_file",
+    "grep_and_search_files_async",
     "GrepAndSearchFileOptions",
 ]
@@ -1,17 +1,18 @@
 """Grep and search tool for finding patterns in stored content."""
 
+import asyncio
 import re
-from typing import Optional, Union, Dict, Any, List
+from typing import Optional, Union, Dict, Any, List, Pattern
 from dataclasses import dataclass
 
-from ..adapters.base import StorageAdapter
+from ..adapters.base import StorageAdapter, _SLOTS
 from ..adapters.filesystem import FileStorageAdapter
 from ..storage.resolver import create_storage_adapter
 from ..storage.known_keys import is_known_key
-from ..storage.grep import grep_object
+from ..storage.grep import grep_object_raw, _compile, _parse_flags
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class GrepAndSearchFileOptions:
     """Options for the grep and search file tool."""
 
@@ -35,7 +36,7 @@ Returns matching lines with line numbers.
 
 def grep_and_search_file(
     key: str,
-    pattern: str,
+    pattern: Union[str, Pattern[str]],
     flags: Optional[str] = None,
     options: Optional[GrepAndSearchFileOptions] = None,
 ) -> Dict[str, Any]:
@@ -47,7 +48,8 @@ def grep_and_search_file(
 
     Args:
         key: The storage key to search (as provided in 'Key: <key>' messages)
-        pattern: Regular expression pattern to search for
+        pattern: Regular expression pattern to search for, as a string or an
+            already compiled pattern
         flags: Optional regex flags (e.g., 'i' for case-insensitive, 'm' for multiline)
         options: Optional configuration for the tool
 
@@ -62,60 +64,134 @@ def grep_and_search_file(
     Example:
         >>> result = grep_and_search_file("data.json", r'"status":\s*"error"', flags="i")
         >>> for match in result.get("matches", []):
-        ...     print(f"{match.line_number}: {match.content}")
+        ...     print(f"{match['line_number']}: {match['content']}")
     """
     if options is None:
         options = GrepAndSearchFileOptions()
 
+    # Results always report the pattern text
+    pattern_text = pattern if isinstance(pattern, str) else pattern.pattern
+
+    try:
+        adapter = _resolve_adapter(options)
+    except Exception as e:
+        return _search_error_result(key, pattern_text, flags, e, "unknown")
+
+    # Check the key before compiling, so calls with unknown keys skip the compile
+    storage_uri = str(adapter)
+    if not is_known_key(storage_uri, key):
+        return _unknown_key_result(key, pattern_text, flags, storage_uri)
+
     # Compile the regex pattern
     try:
-        regex_flags = 0
-        if flags:
-            if "i" in flags:
-                regex_flags |= re.IGNORECASE
-            if "m" in flags:
-                regex_flags |= re.MULTILINE
-            if "s" in flags:
-                regex_flags |= re.DOTALL
-        regex = re.compile(pattern, regex_flags)
+        regex = _compile_pattern(pattern, flags)
     except re.error as e:
-        return {
-            "key": key,
-            "pattern": pattern,
-            "flags": flags or "",
-            "content": f"Invalid regex: {str(e)}",
-        }
+        return _invalid_regex_result(key, pattern_text, flags, e)
+
+    return _search_key(adapter, storage_uri, key, pattern_text, flags, regex)
+
+
+async def grep_and_search_files_async(
+    keys: List[str],
+    pattern: Union[str, Pattern[str]],
+    flags: Optional[str] = None,
+    options: Optional[GrepAndSearchFileOptions] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Search several previously stored files for a pattern concurrently.
+
+    The storage is resolved and the pattern compiled once, then each known
+    key is searched in the default executor. Reads against remote storage such as
+    S3 therefore overlap instead of running back to back.
+
+    Args:
+        keys: The storage keys to search
+        pattern: Regular expression pattern to search for, as a string or an
+            already compiled pattern
+        flags: Optional regex flags (e.g., 'i' for case-insensitive)
+        options: Optional configuration for the tool
+
+    Returns:
+        One result per key, in the same order as ``keys`` and in the same
+        format as :func:`grep_and_search_file`
+    """
+    if options is None:
+        options = GrepAndSearchFileOptions()
+
+    # Results always report the pattern text
+    pattern_text = pattern if isinstance(pattern, str) else pattern.pattern
+
+    try:
+        adapter = _resolve_adapter(options)
+    except Exception as e:
+        return [_search_error_result(key, pattern_text, flags, e, "unknown") for key in keys]
 
+    storage_uri = str(adapter)
+    known = [is_known_key(storage_uri, key) for key in keys]
+    if not any(known):
+        return [_unknown_key_result(key, pattern_text, flags, storage_uri) for key in keys]
+
+    try:
+        regex = _compile_pattern(pattern, flags)
+    except re.error as e:
+        return [
+            _invalid_regex_result(key, pattern_text, flags, e)
+            if is_known
+            else _unknown_key_result(key, pattern_text, flags, storage_uri)
+            for key, is_known in zip(keys, known)
+        ]
+
+    loop = asyncio.get_running_loop()
+    found = iter(
+        await asyncio.gather(
+            *(
+                loop.run_in_executor(
+                    None, _search_key, adapter, storage_uri, key, pattern_text, flags, regex
+                )
+                for key, is_known in zip(keys, known)
+                if is_known
+            )
+        )
+    )
+    return [
+        next(found) if is_known else _unknown_key_result(key, pattern_text, flags, storage_uri)
+        for key, is_known in zip(keys, known)
+    ]
+
+
+def _compile_pattern(pattern: Union[str, Pattern[str]], flags: Optional[str]) -> Pattern[str]:
+    """
+    Compile a pattern string through the shared cache. Compiled patterns are
+    used as-is, unless flags ask for more than they were compiled with.
+    """
+    if isinstance(pattern, str):
+        return _compile(pattern, _parse_flags(flags))
+    if flags:
+        return _compile(pattern.pattern, pattern.flags | _parse_flags(flags))
+    return pattern
+
+
+def _resolve_adapter(options: GrepAndSearchFileOptions) -> StorageAdapter:
+    """Create the storage adapter described by the tool options."""
+    if options.storage:
+        return create_storage_adapter(options.storage)
+    elif options.base_dir:
+        return FileStorageAdapter(base_dir=options.base_dir)
+    return create_storage_adapter()
+
+
+def _search_key(
+    adapter: StorageAdapter,
+    storage_uri: str,
+    key: str,
+    pattern: str,
+    flags: Optional[str],
+    regex: Pattern[str],
+) -> Dict[str, Any]:
+    """Search a single, already validated key and build the tool result."""
     try:
-        # Create storage adapter
-        if options.storage:
-            adapter = create_storage_adapter(options.storage)
-        elif options.base_dir:
-            adapter = FileStorageAdapter(base_dir=options.base_dir)
-        else:
-            adapter = create_storage_adapter()
-
-        storage_uri = str(adapter)
-
-        # Check if key is known
-        if not is_known_key(storage_uri, key):
-            return {
-                "key": key,
-                "pattern": pattern,
-                "flags": flags or "",
-                "content": (
-                    "Tool cannot be used: unknown key. Use a key previously surfaced via "
-                    "'Written to ... Key: <key>' or 'Read from storage ... Key: <key>'. "
-                    "If none exists, re-run the producing tool to persist and get a key."
-                ),
-                "storage": storage_uri,
-            }
-
-        # Search the content
-        matches = grep_object(adapter, key, regex)
-
-        # Convert matches to serializable format
-        match_list = [{"line_number": m.line_number, "content": m.content} for m in matches]
+        # Search the content, getting matches in serializable form directly
+        match_list = grep_object_raw(adapter, key, regex)
 
         return {
             "key": key,
@@ -126,18 +202,54 @@ def grep_and_search_file(
         }
 
     except Exception as e:
-        return {
-            "key": key,
-            "pattern": pattern,
-            "flags": flags or "",
-            "content": (
-                f"Error searching file: {str(e)}. "
-                "Are you sure the storage is correct? If yes, make the original "
-                "tool call again with the same arguments instead of relying on "
-                "readFile or grepAndSearchFile."
-            ),
-            "storage": str(adapter) if "adapter" in locals() else "unknown",
-        }
+        return _search_error_result(key, pattern, flags, e, storage_uri)
+
+
+def _unknown_key_result(
+    key: str, pattern: str, flags: Optional[str], storage_uri: str
+) -> Dict[str, Any]:
+    """Build the tool result for a key that was never written."""
+    return {
+        "key": key,
+        "pattern": pattern,
+        "flags": flags or "",
+        "content": (
+            "Tool cannot be used: unknown key. Use a key previously surfaced via "
+            "'Written to ... Key: <key>' or 'Read from storage ... Key: <key>'. "
+            "If none exists, re-run the producing tool to persist and get a key."
+        ),
+        "storage": storage_uri,
+    }
+
+
+def _invalid_regex_result(
+    key: str, pattern: str, flags: Optional[str], error: re.error
+) -> Dict[str, Any]:
+    """Build the tool result for a pattern that failed to compile."""
+    return {
+        "key": key,
+        "pattern": pattern,
+        "flags": flags or "",
+        "content": f"Invalid regex: {str(error)}",
+    }
+
+
+def _search_error_result(
+    key: str, pattern: str, flags: Optional[str], error: Exception, storage_uri: str
+) -> Dict[str, Any]:
+    """Build the tool result for a search that raised."""
+    return {
+        "key": key,
+        "pattern": pattern,
+        "flags": flags or "",
+        "content": (
+            f"Error searching file: {str(error)}. "
+            "Are you sure the storage is correct? If yes, make the original "
+            "tool call again with the same arguments instead of relying on "
+            "readFile or grepAndSearchFile."
+        ),
+        "storage": storage_uri,
+    }
 
 
 def create_grep_and_search_file_tool(options: Optional[GrepAndSearchFileOptions] = None):
@@ -3,13 +3,13 @@
 from typing import Optional, Union, Dict, Any
 from dataclasses import dataclass
 
-from ..adapters.base import StorageAdapter, StorageReadParams
+from ..adapters.base import StorageAdapter, StorageReadParams, _SLOTS
 from ..adapters.filesystem import FileStorageAdapter
 from ..storage.resolver import create_storage_adapter
 from ..storage.known_keys import is_known_key
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class ReadFileOptions:
     """Options for the read file tool."""
 
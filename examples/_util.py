@@ -0,0 +1,36 @@
+"""Helpers shared by the example scripts."""
+
+import json
+from typing import Any, Dict, List
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class _ByteCounter:
+    """Write-only sink that counts what json.dump writes instead of keeping it."""
+
+    def __init__(self):
+        self.n = 0
+
+    def write(self, s: str) -> None:
+        # json.dump escapes non-ASCII by default, so characters == bytes
+        self.n += len(s)
+
+
+def dumps(value: Any) -> str:
+    """Serialize a value as compact JSON, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(value).decode("utf-8")
+    return json.dumps(value, separators=(",", ":"))
+
+
+def payload_size(messages: List[Dict[str, Any]]) -> int:
+    """Return the compact JSON size of messages without building the full string."""
+    if orjson is not None:
+        return len(orjson.dumps(messages))
+    counter = _ByteCounter()
+    json.dump(messages, counter, separators=(",", ":"))
+    return counter.n
@@ -3,25 +3,95 @@
 End-to-end example using OpenAI Chat Completions API with ctx-zip for tool result compaction.
 
 Requirements:
-    pip install openai ctxzippy
+    pip install openai "httpx[http2]" ctxzippy
     export OPENAI_API_KEY="your-key-here"
 """
 
 import os
+import re
 import json
-import asyncio
-from typing import List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import List, Dict, Any, Optional
+import httpx
 from openai import OpenAI
 
 # Import ctx-zip
-from ctxzippy import compact_messages, CompactOptions
-from ctxzippy.tools import read_file, grep_and_search_file
-
-# Initialize OpenAI client
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+from ctxzippy import CompactOptions
+from ctxzippy.compact import compact_messages_sync
+from ctxzippy.tools import read_file
+
+from _util import dumps, payload_size
+
+# Matches the storage key in compacted tool results ("Key: xxx.txt"), which may be
+# followed by a sentence-ending period
+_KEY_RE = re.compile(r"Key:\s*([^\s]+\.txt|[^\s]+\.json|[^\s.]+)")
+
+# Revenue entries in the stored sales data
+REVENUE_RE = re.compile(r'"revenue":\s*\d+')
+
+# Initialize OpenAI client, reusing HTTP/2 connections across requests
+client = OpenAI(
+    api_key=os.getenv("OPENAI_API_KEY"),
+    http_client=httpx.Client(
+        http2=True,
+        timeout=httpx.Timeout(60.0),
+        limits=httpx.Limits(max_keepalive_connections=8, max_connections=16),
+    ),
+)
+
+
+# Lists of uniform rows longer than this are folded into a digest before compaction
+FOLD_THRESHOLD = 20
+FOLD_SAMPLE_SIZE = 5
+
+
+def prefold_tool_result(value: Any) -> Any:
+    """
+    Fold long lists of same-shaped dicts into a count, a sample and per-field
+    numeric stats, so compaction stores a small digest instead of every row.
+    """
+    if isinstance(value, dict):
+        return {k: prefold_tool_result(v) for k, v in value.items()}
+    if not isinstance(value, list):
+        return value
+    if (
+        len(value) > FOLD_THRESHOLD
+        and all(isinstance(row, dict) for row in value)
+        and len({frozenset(row) for row in value}) == 1
+    ):
+        stats = {}
+        for field in value[0]:
+            numbers = [row[field] for row in value]
+            if all(isinstance(n, (int, float)) and not isinstance(n, bool) for n in numbers):
+                stats[field] = {"min": min(numbers), "max": max(numbers), "sum": sum(numbers)}
+        return {
+            "__folded__": True,
+            "count": len(value),
+            "sample": [prefold_tool_result(row) for row in value[:FOLD_SAMPLE_SIZE]],
+            "stats": stats,
+        }
+    return [prefold_tool_result(v) for v in value]
+
+
+# Product rows are identical for every month, so they are built once and shared
+PRODUCT_TEMPLATE = [
+    {
+        "id": f"PROD-{j:04d}",
+        "name": f"Product {j}",
+        "sales": 100 + (j * 10),
+        "revenue": 5000 + (j * 500),
+    }
+    for j in range(1, 51)  # 50 products per month
+]
+INDUSTRIES = ("tech", "finance", "retail", "healthcare")
+COMPANY_SIZES = ("large", "medium", "small")
+INTERACTION_TYPES = ("purchase", "support", "inquiry")
 
 
-# Define dummy tools that return large data
+# Define dummy tools that return large data. Both are deterministic, so results
+# are cached per arguments; callers treat the returned dicts as read-only.
+@lru_cache(maxsize=32)
 def get_sales_data(year: int, region: str) -> Dict[str, Any]:
     """Dummy tool that returns large sales data."""
     # Simulate large dataset
@@ -38,15 +108,7 @@ def get_sales_data(year: int, region: str) -> Dict[str, Any]:
                 "month": f"2024-{i:02d}",
                 "revenue": 450000 + (i * 12000),
                 "transactions": 750 + (i * 23),
-                "products": [
-                    {
-                        "id": f"PROD-{j:04d}",
-                        "name": f"Product {j}",
-                        "sales": 100 + (j * 10),
-                        "revenue": 5000 + (j * 500),
-                    }
-                    for j in range(1, 51)  # 50 products per month
-                ],
+                "products": PRODUCT_TEMPLATE,
             }
             for i in range(1, 13)  # 12 months
         ],
@@ -62,8 +124,8 @@ def get_sales_data(year: int, region: str) -> Dict[str, Any]:
                 "total_spent": 50000 - (i * 1000),
                 "transactions": 45 - i,
                 "metadata": {
-                    "industry": ["tech", "finance", "retail", "healthcare"][i % 4],
-                    "size": ["large", "medium", "small"][i % 3],
+                    "industry": INDUSTRIES[i % 4],
+                    "size": COMPANY_SIZES[i % 3],
                     "notes": f"Important notes about customer {i}" * 10,
                 },
             }
@@ -73,6 +135,7 @@ def get_sales_data(year: int, region: str) -> Dict[str, Any]:
     return data
 
 
+@lru_cache(maxsize=32)
 def analyze_customer_behavior(customer_id: str) -> Dict[str, Any]:
     """Dummy tool that returns customer behavior analysis."""
     return {
@@ -81,7 +144,10 @@ def analyze_customer_behavior(customer_id: str) -> Dict[str, Any]:
             "purchase_patterns": {
                 "frequency": "weekly",
                 "avg_basket_size": 125.50,
-                "preferred_categories": ["electronics", "software", "services"] * 20,
+                "preferred_categories": {
+                    "values": ["electronics", "software", "services"],
+                    "count": 60,
+                },
                 "time_preferences": {
                     "day_of_week": ["Monday", "Wednesday", "Friday"],
                     "time_of_day": "morning",
@@ -103,7 +169,7 @@ def analyze_customer_behavior(customer_id: str) -> Dict[str, Any]:
             "interaction_history": [
                 {
                     "date": f"2024-{(i % 12) + 1:02d}-{(i % 28) + 1:02d}",
-                    "type": ["purchase", "support", "inquiry"][i % 3],
+                    "type": INTERACTION_TYPES[i % 3],
                     "details": f"Detailed interaction log entry {i}" * 5,
                 }
                 for i in range(1000)  # 1000 interactions
@@ -112,8 +178,8 @@ def analyze_customer_behavior(customer_id: str) -> Dict[str, Any]:
     }
 
 
-# Tool definitions for OpenAI
-TOOL_DEFINITIONS = [
+# Tool definitions for OpenAI (static, so kept as an immutable tuple)
+TOOL_DEFINITIONS = (
     {
         "type": "function",
         "function": {
@@ -146,7 +212,7 @@ TOOL_DEFINITIONS = [
             },
         },
     },
-]
+)
 
 
 def execute_tool(tool_name: str, arguments: Dict[str, Any]) -> Any:
@@ -162,6 +228,18 @@ def execute_tool(tool_name: str, arguments: Dict[str, Any]) -> Any:
         return {"error": f"Unknown tool: {tool_name}"}
 
 
+def find_storage_key(messages: List[Dict[str, Any]]) -> Optional[str]:
+    """Return the first storage key referenced by a compacted tool result."""
+    values = (
+        item["output"].get("value", "")
+        for msg in messages
+        if msg.get("role") == "tool"
+        for item in msg.get("content", [])
+        if isinstance(item.get("output"), dict) and item["output"].get("type") == "text"
+    )
+    return next((m.group(1) for m in map(_KEY_RE.search, values) if m), None)
+
+
 def format_messages_for_openai(messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """Convert ctx-zip format messages to OpenAI format."""
     formatted = []
@@ -185,29 +263,31 @@ def format_messages_for_openai(messages: List[Dict[str, Any]]) -> List[Dict[str,
             # Tool messages need special handling
             if isinstance(content, list):
                 for item in content:
-                    if item.get("type") == "tool-result":
-                        tool_call_id = item.get("toolCallId", "default-id")
-                        output = item.get("output", {})
+                    if item.get("type") != "tool-result":
+                        continue
 
-                        # Extract the actual content
-                        if isinstance(output, dict):
-                            if output.get("type") == "text":
-                                content_str = output.get("value", "")
-                            elif output.get("type") == "json":
-                                content_str = json.dumps(output.get("value", {}))
-                            else:
-                                content_str = str(output)
-                        else:
-                            content_str = str(output)
-
-                        formatted.append(
-                            {"role": "tool", "tool_call_id": tool_call_id, "content": content_str}
-                        )
+                    # Extract the actual content
+                    output = item.get("output", {})
+                    output_type = output.get("type") if isinstance(output, dict) else None
+                    if output_type == "text":
+                        content_str = output.get("value", "")
+                    elif output_type == "json":
+                        content_str = dumps(output.get("value", {}))
+                    else:
+                        content_str = str(output)
+
+                    formatted.append(
+                        {
+                            "role": "tool",
+                            "tool_call_id": item.get("toolCallId", "default-id"),
+                            "content": content_str,
+                        }
+                    )
 
     return formatted
 
 
-async def main():
+def main():
     """Main example demonstrating ctx-zip with OpenAI."""
     print("🚀 Starting OpenAI + ctx-zip example\n")
 
@@ -238,12 +318,7 @@ async def main():
     # Preserve tool_calls in the message
     if assistant_message.tool_calls:
         assistant_msg_dict["tool_calls"] = [
-            {
-                "id": tc.id,
-                "type": "function",
-                "function": {"name": tc.function.name, "arguments": tc.function.arguments},
-            }
-            for tc in assistant_message.tool_calls
+            tc.model_dump(mode="json", exclude_none=True) for tc in assistant_message.tool_calls
         ]
 
     messages.append(assistant_msg_dict)
@@ -252,12 +327,18 @@ async def main():
     if assistant_message.tool_calls:
         print(f"\n🔧 Assistant requested {len(assistant_message.tool_calls)} tool calls:")
 
-        for tool_call in assistant_message.tool_calls:
-            print(f"  - {tool_call.function.name}")
+        # Execute the tools concurrently
+        tool_calls = assistant_message.tool_calls
+        with ThreadPoolExecutor(max_workers=len(tool_calls)) as executor:
+            results = list(
+                executor.map(
+                    lambda tc: execute_tool(tc.function.name, json.loads(tc.function.arguments)),
+                    tool_calls,
+                )
+            )
 
-            # Execute the tool
-            arguments = json.loads(tool_call.function.arguments)
-            result = execute_tool(tool_call.function.name, arguments)
+        for tool_call, result in zip(tool_calls, results):
+            print(f"  - {tool_call.function.name}")
 
             # Add tool result to messages (in ctx-zip format)
             messages.append(
@@ -268,7 +349,7 @@ async def main():
                             "type": "tool-result",
                             "toolCallId": tool_call.id,
                             "toolName": tool_call.function.name,
-                            "output": {"type": "json", "value": result},
+                            "output": {"type": "json", "value": prefold_tool_result(result)},
                         }
                     ],
                 }
@@ -281,7 +362,7 @@ async def main():
         )
 
         # Print size before compaction
-        original_size = len(json.dumps(messages))
+        original_size = payload_size(messages)
         print(f"\n📊 Message history size BEFORE compaction: {original_size:,} bytes")
 
         # Apply ctx-zip compaction
@@ -289,13 +370,14 @@ async def main():
         compact_options = CompactOptions(
             storage="file:///tmp/openai-ctx-storage",
             boundary="entire-conversation",  # Compact all tool messages
-            serialize_result=lambda v: json.dumps(v, indent=2),
+            serialize_result=dumps,
         )
 
-        messages = await compact_messages(messages, compact_options)
+        # Compaction has a synchronous core, so no event loop is needed
+        messages = compact_messages_sync(messages, compact_options)
 
         # Print size after compaction
-        compacted_size = len(json.dumps(messages))
+        compacted_size = payload_size(messages)
         reduction_pct = ((original_size - compacted_size) / original_size) * 100
         print(f"📊 Message history size AFTER compaction: {compacted_size:,} bytes")
         print(f"✨ Size reduction: {reduction_pct:.1f}%")
@@ -327,27 +409,9 @@ async def main():
         print("=" * 60)
 
         # Extract a storage key from the compacted messages
-        storage_key = None
-        for msg in messages:
-            if msg.get("role") == "tool":
-                for item in msg.get("content", []):
-                    output = item.get("output", {})
-                    if output.get("type") == "text" and "Key:" in output.get("value", ""):
-                        # Extract key from "Key: xxx.txt" pattern
-                        value = output.get("value", "")
-                        key_start = value.find("Key:") + 4
-                        # Find the end of the key (could be .txt, .json, or end with period/space)
-                        remaining = value[key_start:].strip()
-                        # Take everything up to the next period followed by space, or end of string
-                        import re
-
-                        key_match = re.match(r"([^\s]+\.txt|[^\s]+\.json|[^\s\.]+)", remaining)
-                        if key_match:
-                            storage_key = key_match.group(1)
-                            print(f"  - Extracted key: {storage_key}")
-                            break
-                if storage_key:
-                    break
+        storage_key = find_storage_key(messages)
+        if storage_key:
+            print(f"  - Extracted key: {storage_key}")
 
         if storage_key:
             print(f"\n🔍 Found stored key: {storage_key}")
@@ -366,27 +430,19 @@ async def main():
             print(f"\n📄 First 500 chars of stored content:")
             print(file_content["content"][:500] + "...")
 
-            # Search for specific patterns
-            from ctxzippy.tools import GrepAndSearchFileOptions
-
-            grep_options = GrepAndSearchFileOptions(storage="file:///tmp/openai-ctx-storage")
-            search_results = grep_and_search_file(
-                storage_key, pattern=r'"revenue":\s*\d+', options=grep_options
-            )
-
-            # Check if search was successful
-            if "matches" in search_results:
-                print(f"\n🔎 Found {len(search_results['matches'])} revenue entries:")
-                for match in search_results["matches"][:3]:
-                    print(f"  Line {match['line_number']}: {match['content'].strip()}")
+            # read_file reports failures in its content rather than raising
+            content = file_content["content"]
+            if not content.startswith(("Tool cannot be used", "Error reading file")):
+                # Search the content already read instead of fetching the file again
+                revenues = [m.group(0) for m in REVENUE_RE.finditer(content)]
+                print(f"\n🔎 Found {len(revenues)} revenue entries:")
+                for entry in revenues[:3]:
+                    print(f"  {entry}")
             else:
-                print(
-                    f"\n⚠️ Could not search file: {search_results.get('content', 'Unknown error')}"
-                )
+                print(f"\n⚠️ Could not read file: {content}")
 
     print("\n✨ Example complete!")
 
 
 if __name__ == "__main__":
-    # Run the async main function
-    asyncio.run(main())
+    main()
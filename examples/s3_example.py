@@ -12,12 +12,31 @@ Requirements:
 """
 
 import asyncio
-import json
-from typing import List, Dict, Any
+from typing import Dict, Any
 
 from ctxzippy import compact_messages, CompactOptions
 from ctxzippy.adapters import S3StorageAdapter, S3StorageOptions
 
+from _util import payload_size
+
+
+def transaction_columns(count: int) -> Dict[str, Any]:
+    """
+    Build sample transactions column-wise, so each field name is emitted once
+    rather than once per row.
+    """
+    ids = range(count)
+    return {
+        "columns": ["id", "amount", "product", "customer", "notes"],
+        "rows": {
+            "id": [f"TXN-{i:05d}" for i in ids],
+            "amount": [1000 * i for i in ids],
+            "product": [f"Product-{i % 100}" for i in ids],
+            "customer": [f"Customer-{i % 500}" for i in ids],
+            "notes": [f"Transaction details for {i}" * 50 for i in ids],
+        },
+    }
+
 
 async def example_with_s3_adapter():
     """Example using S3 adapter with explicit configuration."""
@@ -46,21 +65,16 @@ async def example_with_s3_adapter():
                     "toolName": "get_sales_data",
                     "output": {
                         "type": "json",
+                        # Already columnar, so there are no repeated rows to fold
                         "value": {
                             "quarter": "Q3-2025",
                             "total_revenue": 15234567.89,
-                            "transactions": [
-                                {
-                                    "id": f"TXN-{i:05d}",
-                                    "amount": 1000 * i,
-                                    "product": f"Product-{i % 100}",
-                                    "customer": f"Customer-{i % 500}",
-                                    "metadata": {"notes": f"Transaction details for {i}" * 50}
-                                }
-                                for i in range(5000)  # 5000 transactions
-                            ],
+                            "transactions": transaction_columns(5000),
                             "summary": {
-                                "by_product": {f"Product-{i}": i * 12345.67 for i in range(100)},
+                                "by_product": {
+                                    "product": [f"Product-{i}" for i in range(100)],
+                                    "revenue": [i * 12345.67 for i in range(100)],
+                                },
                                 "by_region": {
                                     "North": 5000000,
                                     "South": 4000000,
@@ -81,10 +95,11 @@ async def example_with_s3_adapter():
     print(f"📁 With prefix: {s3_adapter.prefix or '(root)'}")
     
     # Calculate original size
-    original_size = len(json.dumps(messages))
+    original_size = payload_size(messages)
     print(f"\n📊 Original message size: {original_size:,} bytes")
     
-    # Compact messages using S3 storage
+    # Compact messages using S3 storage. With the default serializer, JSON
+    # results are streamed into the upload rather than built as one string.
     compacted = await compact_messages(
         messages,
         CompactOptions(
@@ -94,7 +109,7 @@ async def example_with_s3_adapter():
     )
     
     # Calculate compacted size
-    compacted_size = len(json.dumps(compacted))
+    compacted_size = payload_size(compacted)
     reduction = ((original_size - compacted_size) / original_size) * 100
     print(f"📊 Compacted size: {compacted_size:,} bytes")
     print(f"✨ Reduction: {reduction:.1f}%")
@@ -0,0 +1,51 @@
+"""Shared pytest fixtures."""
+
+import asyncio
+import os
+from unittest.mock import patch
+
+import pytest
+
+from ctxzippy.adapters import FileStorageAdapter
+
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+
+@pytest.fixture(scope="module")
+def event_loop():
+    """One event loop per test module, backed by uvloop when it is installed."""
+    loop = uvloop.new_event_loop() if uvloop is not None else asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture(scope="module")
+def storage_adapter(tmp_path_factory):
+    """One filesystem adapter per test module, over a pytest-managed directory."""
+    return FileStorageAdapter(base_dir=str(tmp_path_factory.mktemp("storage")))
+
+
+@pytest.fixture(scope="session")
+def s3_client():
+    """
+    A boto3 S3 client backed by moto's in-memory S3, shared by the session.
+
+    The "test-bucket" bucket is created once; adapters built while the fixture
+    is active talk to the same in-memory backend.
+    """
+    boto3 = pytest.importorskip("boto3")
+    moto = pytest.importorskip("moto")
+
+    credentials = {
+        "AWS_ACCESS_KEY_ID": "testing",
+        "AWS_SECRET_ACCESS_KEY": "testing",
+        "AWS_SESSION_TOKEN": "testing",
+        "AWS_DEFAULT_REGION": "us-east-1",
+    }
+    with patch.dict(os.environ, credentials), moto.mock_aws():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket="test-bucket")
+        yield client
@@ -1,8 +1,9 @@
 """Tests for storage adapters."""
 
-import tempfile
+import io
 import os
 from pathlib import Path
+from unittest.mock import patch
 
 import pytest
 
@@ -17,17 +18,12 @@ from ctxzippy.adapters.filesystem import file_uri_to_options
 class TestFileStorageAdapter:
     """Test suite for filesystem storage adapter."""
 
-    def setup_method(self):
-        """Set up test fixtures."""
-        self.temp_dir = tempfile.mkdtemp(prefix="ctxzippy_adapter_test_")
+    @pytest.fixture(autouse=True)
+    def _adapter(self, tmp_path):
+        """Give each test an adapter over its own pytest-managed directory."""
+        self.temp_dir = str(tmp_path)
         self.adapter = FileStorageAdapter(base_dir=self.temp_dir)
 
-    def teardown_method(self):
-        """Clean up after tests."""
-        import shutil
-
-        shutil.rmtree(self.temp_dir, ignore_errors=True)
-
     def test_resolve_key(self):
         """Test key resolution with path safety."""
         # Basic resolution
@@ -78,6 +74,59 @@ class TestFileStorageAdapter:
             content = stream.read()
             assert content == binary_data
 
+        # Read raw bytes
+        assert self.adapter.read_bytes(StorageReadParams(key="binary.dat")) == binary_data
+
+    def test_open_read_stream_large_file(self):
+        """Test streaming a file large enough to be memory-mapped."""
+        data = bytes(range(256)) * 1024  # 256 KiB
+        self.adapter.write(StorageWriteParams(key="large.bin", body=data))
+
+        with self.adapter.open_read_stream(StorageReadParams(key="large.bin")) as stream:
+            assert stream.read(10) == data[:10]
+            buffer = bytearray(100)
+            assert stream.readinto(buffer) == 100
+            assert bytes(buffer) == data[10:110]
+            assert stream.read() == data[110:]
+
+            stream.seek(0)
+            assert b"".join(iter(lambda: stream.read(50000), b"")) == data
+
+            assert stream.seek(-10, io.SEEK_END) == len(data) - 10
+            assert stream.seek(4, io.SEEK_CUR) == len(data) - 6
+            assert stream.read() == data[-6:]
+
+    def test_iter_lines(self):
+        """Test streaming a file line by line."""
+        self.adapter.write(StorageWriteParams(key="lines.txt", body="first\r\nsecond\n\nlast\n"))
+
+        lines = list(self.adapter.iter_lines(StorageReadParams(key="lines.txt")))
+        assert lines == ["first", "second", "", "last"]
+
+        # Lines split wherever str.splitlines splits them, even across read chunks
+        body = "a\rb\x0cc\u2028d\r\n" * 3 + "end"
+        self.adapter.write(StorageWriteParams(key="breaks.txt", body=body))
+        with patch("ctxzippy.adapters.filesystem._LINE_CHUNK_SIZE", 3):
+            lines = list(self.adapter.iter_lines(StorageReadParams(key="breaks.txt")))
+        assert lines == body.splitlines()
+
+        with pytest.raises(FileNotFoundError):
+            self.adapter.iter_lines(StorageReadParams(key="nonexistent.txt"))
+
+    def test_read_mmap(self):
+        """Test memory-mapping a stored file."""
+        self.adapter.write(StorageWriteParams(key="mapped.txt", body="line one\nline two\n"))
+
+        mapped = self.adapter.read_mmap(StorageReadParams(key="mapped.txt"))
+        try:
+            assert mapped[:] == b"line one\nline two\n"
+            assert mapped.find(b"two") == 14
+        finally:
+            mapped.close()
+
+        with pytest.raises(FileNotFoundError):
+            self.adapter.read_mmap(StorageReadParams(key="nonexistent.txt"))
+
     def test_write_creates_directories(self):
         """Test that write creates necessary parent directories."""
         params = StorageWriteParams(key="nested/deep/file.txt", body="Content")
@@ -90,6 +139,68 @@ class TestFileStorageAdapter:
         assert file_path.exists()
         assert file_path.read_text() == "Content"
 
+    @pytest.mark.parametrize("count", [1, 100])
+    def test_write_shared_prefix_mkdir_memoized(self, monkeypatch, count):
+        """Test that writes under a common prefix create the directory only once."""
+        calls = []
+        real_mkdir = Path.mkdir
+
+        def counting_mkdir(path, *args, **kwargs):
+            calls.append(path)
+            return real_mkdir(path, *args, **kwargs)
+
+        monkeypatch.setattr(Path, "mkdir", counting_mkdir)
+
+        for i in range(count):
+            self.adapter.write(StorageWriteParams(key=f"nested/deep/{i}.txt", body="x"))
+
+        # mkdir(parents=True) recurses once per missing ancestor, no more
+        deep = self.adapter.base_dir / "nested" / "deep"
+        assert calls == [deep, deep.parent, deep]
+        assert len(os.listdir(deep)) == count
+
+    def test_open_write_stream(self):
+        """Test streaming content into a new file."""
+        with self.adapter.open_write_stream("nested/stream.txt") as stream:
+            stream.write(b"chunk one, ")
+            stream.write(b"chunk two")
+
+        content = self.adapter.read_text(StorageReadParams(key="nested/stream.txt"))
+        assert content == "chunk one, chunk two"
+
+    def test_open_write_stream_failure_leaves_no_file(self):
+        """Test that a failed streamed write leaves neither a partial nor a temporary file."""
+        self.adapter.write(StorageWriteParams(key="nested/kept.txt", body="original"))
+
+        for key in ("nested/partial.txt", "nested/kept.txt"):
+            with pytest.raises(RuntimeError):
+                with self.adapter.open_write_stream(key) as stream:
+                    stream.write(b"partial")
+                    raise RuntimeError("serialization failed")
+
+        assert os.listdir(Path(self.temp_dir) / "nested") == ["kept.txt"]
+        assert self.adapter.read_text(StorageReadParams(key="nested/kept.txt")) == "original"
+
+    def test_write_from_path(self):
+        """Test copying an existing file into storage."""
+        src = Path(self.temp_dir) / "source.bin"
+        src.write_bytes(b"\x00payload\xff")
+
+        result = self.adapter.write_from_path(src, "copies/dest.bin")
+        assert result.key == "copies/dest.bin"
+        assert result.url.startswith("file://")
+        assert (Path(self.temp_dir) / "copies" / "dest.bin").read_bytes() == b"\x00payload\xff"
+
+    def test_write_recreates_removed_directory(self):
+        """Test that write recovers when a previously created directory is removed."""
+        import shutil
+
+        self.adapter.write(StorageWriteParams(key="nested/first.txt", body="one"))
+        shutil.rmtree(Path(self.temp_dir) / "nested")
+
+        self.adapter.write(StorageWriteParams(key="nested/second.txt", body="two"))
+        assert (Path(self.temp_dir) / "nested" / "second.txt").read_text() == "two"
+
     def test_read_nonexistent_file(self):
         """Test reading a file that doesn't exist."""
         with pytest.raises(FileNotFoundError):
@@ -116,16 +227,54 @@ class TestFileStorageAdapter:
         options = file_uri_to_options("file:///tmp/storage")
         assert options == {"base_dir": "/tmp/storage"}
 
+        # Percent-encoded characters are decoded, with or without a query string
+        assert file_uri_to_options("file:///tmp/my%20storage") == {"base_dir": "/tmp/my storage"}
+        assert file_uri_to_options("file:///tmp/my%20storage?x=1") == {
+            "base_dir": "/tmp/my storage"
+        }
+
+        # Tabs and newlines are dropped, as urlparse drops them
+        assert file_uri_to_options("file:///tmp/sto\trage\r\n") == {"base_dir": "/tmp/storage"}
+
         # Windows-style path (if on Windows)
         if os.name == "nt":
             options = file_uri_to_options("file:///C:/temp/storage")
-            assert options["base_dir"].replace("\\", "/") == "C:/temp/storage"
+            assert options == {"base_dir": "C:/temp/storage"}
 
         # Invalid URI
         with pytest.raises(ValueError):
             file_uri_to_options("http://example.com")
 
 
+class TestCreateStorageAdapter:
+    """Test storage adapter resolution."""
+
+    def test_uri_adapters_are_reused(self, tmp_path):
+        """Test that the same URI string resolves to the same adapter instance."""
+        from ctxzippy.storage import create_storage_adapter
+
+        uri = tmp_path.resolve().as_uri()
+
+        adapter = create_storage_adapter(uri)
+        assert isinstance(adapter, FileStorageAdapter)
+        assert create_storage_adapter(uri) is adapter
+
+    def test_default_adapter_is_shared(self):
+        """Test that the default temp directory adapter is created once per process."""
+        from ctxzippy.storage import create_storage_adapter
+
+        adapter = create_storage_adapter()
+        assert isinstance(adapter, FileStorageAdapter)
+        assert create_storage_adapter() is adapter
+
+    def test_adapter_instance_passthrough(self, tmp_path):
+        """Test that adapter instances are returned unchanged."""
+        from ctxzippy.storage import create_storage_adapter
+
+        adapter = FileStorageAdapter(base_dir=str(tmp_path))
+        assert create_storage_adapter(adapter) is adapter
+
+
 class TestStorageAdapterProtocol:
     """Test the storage adapter protocol compliance."""
 
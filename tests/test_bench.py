@@ -0,0 +1,76 @@
+"""Throughput benchmarks for hot paths.
+
+Run with pytest-benchmark installed; compare runs against a saved baseline with
+``--benchmark-autosave`` and ``--benchmark-compare --benchmark-compare-fail=median:15%``.
+"""
+
+from typing import Any, Dict, List
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from ctxzippy import compact_messages, CompactOptions
+from ctxzippy.storage import clear_known_keys, is_known_key, register_known_key
+
+
+def _conversation(length: int) -> List[Dict[str, Any]]:
+    """Build a conversation of user / tool / assistant turns ending in assistant text."""
+    messages: List[Dict[str, Any]] = []
+    i = 0
+    while len(messages) < length - 1:
+        messages.append({"role": "user", "content": f"Request {i}"})
+        messages.append(
+            {
+                "role": "tool",
+                "content": [
+                    {
+                        "type": "tool-result",
+                        "toolName": "fetch",
+                        "output": {"type": "json", "value": {"id": i, "rows": list(range(50))}},
+                    }
+                ],
+            }
+        )
+        messages.append({"role": "assistant", "content": f"Response {i}"})
+        i += 1
+    return messages[: length - 1] + [{"role": "assistant", "content": "Done"}]
+
+
+class TestBenchmarks:
+    """Throughput of compaction and known-key lookups at realistic sizes."""
+
+    @pytest.fixture(autouse=True)
+    def _reset_known_keys(self):
+        """Drop the keys registered by the benchmark rounds."""
+        yield
+        clear_known_keys()
+
+    def test_compact_throughput(self, benchmark, event_loop, storage_adapter):
+        """Benchmark compacting a 1k-message conversation."""
+        options = CompactOptions(storage=storage_adapter, boundary="entire-conversation")
+
+        # Compaction rewrites tool-result parts in place, so each round gets a fresh copy
+        def setup():
+            return (_conversation(1000),), {}
+
+        def run(messages):
+            return event_loop.run_until_complete(compact_messages(messages, options))
+
+        result = benchmark.pedantic(run, setup=setup, rounds=5)
+
+        assert len(result) == 1000
+        assert "Written to" in result[1]["content"][0]["output"]["value"]
+
+    def test_is_known_key_throughput(self, benchmark):
+        """Benchmark key lookups with many registered keys."""
+        for i in range(10_000):
+            register_known_key(f"file:///tmp/{i % 4}", f"key-{i}.txt")
+
+        def lookups():
+            for _ in range(100_000):
+                is_known_key("file:///tmp/1", "key-5001.txt")
+            return is_known_key("file:///tmp/1", "key-5001.txt")
+
+        assert benchmark(lookups)
+        assert not is_known_key("file:///tmp/2", "key-5001.txt")
@@ -1,42 +1,37 @@
 """Tests for the message compaction functionality."""
 
 import json
-import tempfile
-import asyncio
 from pathlib import Path
 from typing import List, Dict, Any
 
 import pytest
 
 from ctxzippy import compact_messages, CompactOptions
-from ctxzippy.adapters import FileStorageAdapter
+from ctxzippy.compact import compact_messages_sync
 from ctxzippy.storage import clear_known_keys
-
-
-# Helper to run async functions in tests
-def async_run(coro):
-    """Run an async coroutine."""
-    return asyncio.run(coro)
+from ctxzippy.strategies.write_tool_results import (
+    detect_window_range,
+    format_storage_path_for_display,
+    message_has_text_content,
+)
 
 
 class TestCompactor:
     """Test suite for message compaction."""
 
-    def setup_method(self):
-        """Set up test fixtures."""
-        # Clear known keys before each test
-        clear_known_keys()
-        # Create a temporary directory for storage
-        self.temp_dir = tempfile.mkdtemp(prefix="ctxzippy_test_")
-        self.storage_adapter = FileStorageAdapter(base_dir=self.temp_dir)
+    @pytest.fixture(autouse=True)
+    def _use_event_loop(self, event_loop):
+        """Run coroutines on the module's shared event loop."""
+        self.async_run = event_loop.run_until_complete
 
-    def teardown_method(self):
-        """Clean up after tests."""
+    @pytest.fixture(autouse=True)
+    def _use_storage(self, storage_adapter):
+        """Share the module's storage; keys are unique, so only known keys are reset."""
+        clear_known_keys()
+        self.storage_adapter = storage_adapter
+        self.temp_dir = str(storage_adapter.base_dir)
+        yield
         clear_known_keys()
-        # Clean up temp directory
-        import shutil
-
-        shutil.rmtree(self.temp_dir, ignore_errors=True)
 
     def test_basic_compaction(self):
         """Test basic message compaction with tool results."""
@@ -60,7 +55,7 @@ class TestCompactor:
 
         options = CompactOptions(storage=self.storage_adapter, boundary="entire-conversation")
 
-        result = async_run(compact_messages(messages, options))
+        result = self.async_run(compact_messages(messages, options))
 
         # Check that the tool result was replaced
         assert len(result) == 3
@@ -100,7 +95,7 @@ class TestCompactor:
             storage=self.storage_adapter, boundary="since-last-assistant-or-user-text"
         )
 
-        result = async_run(compact_messages(messages, options))
+        result = self.async_run(compact_messages(messages, options))
 
         # Only the last tool message should be compacted
         assert result[1]["content"][0]["output"]["type"] == "json"  # Old data unchanged
@@ -124,7 +119,7 @@ class TestCompactor:
             storage=self.storage_adapter, boundary={"type": "first-n-messages", "count": 2}
         )
 
-        result = async_run(compact_messages(messages, options))
+        result = self.async_run(compact_messages(messages, options))
 
         # First 2 messages should be kept intact
         assert result[0] == messages[0]
@@ -158,7 +153,7 @@ class TestCompactor:
 
         options = CompactOptions(storage=self.storage_adapter, boundary="entire-conversation")
 
-        result = async_run(compact_messages(messages, options))
+        result = self.async_run(compact_messages(messages, options))
 
         # Reader tool output should be replaced with reference, not re-written
         tool_output = result[1]["content"][0]["output"]
@@ -166,9 +161,36 @@ class TestCompactor:
         assert "Read from" in tool_output["value"]
         assert "data.txt" in tool_output["value"]
 
+    def test_reader_tool_names_changed_after_construction(self):
+        """Test that changes to storage_reader_tool_names after construction are honoured."""
+
+        def make_messages():
+            return [
+                {"role": "user", "content": "Look it up"},
+                {
+                    "role": "tool",
+                    "content": [
+                        {
+                            "type": "tool-result",
+                            "toolName": "lookup",
+                            "output": {"type": "json", "value": {"key": "k.txt", "storage": "s"}},
+                        }
+                    ],
+                },
+                {"role": "assistant", "content": "Done"},
+            ]
+
+        options = CompactOptions(storage=self.storage_adapter, boundary="entire-conversation")
+        result = self.async_run(compact_messages(make_messages(), options))
+        assert "Written to" in result[1]["content"][0]["output"]["value"]
+
+        options.storage_reader_tool_names.append("lookup")
+        result = self.async_run(compact_messages(make_messages(), options))
+        assert "Read from" in result[1]["content"][0]["output"]["value"]
+
     def test_empty_messages(self):
         """Test compaction with empty message list."""
-        result = async_run(compact_messages([], CompactOptions()))
+        result = self.async_run(compact_messages([], CompactOptions()))
         assert result == []
 
     def test_no_tool_messages(self):
@@ -178,7 +200,7 @@ class TestCompactor:
             {"role": "assistant", "content": "Hi there!"},
         ]
 
-        result = async_run(compact_messages(messages, CompactOptions()))
+        result = self.async_run(compact_messages(messages, CompactOptions()))
         assert result == messages
 
     def test_custom_serializer(self):
@@ -204,7 +226,7 @@ class TestCompactor:
             boundary="entire-conversation",
         )
 
-        result = async_run(compact_messages(messages, options))
+        result = self.async_run(compact_messages(messages, options))
 
         # Check file was written with custom serialization
         key = None
@@ -218,8 +240,40 @@ class TestCompactor:
 
         if key:
             file_path = Path(self.temp_dir) / key
-            content = file_path.read_text()
-            assert content.startswith("CUSTOM:")
+            # Only the prefix matters, so don't read and decode the whole file
+            with open(file_path, "rb") as f:
+                assert f.read(len(b"CUSTOM:")) == b"CUSTOM:"
+
+    def test_serializer_reused_for_shared_value(self):
+        """Test that a value shared by several tool results is serialized once."""
+        calls = []
+
+        def serializer(value):
+            calls.append(value)
+            return json.dumps(value)
+
+        shared = {"rows": list(range(100))}
+        messages = [{"role": "user", "content": "Fetch twice"}]
+        for _ in range(2):
+            messages.append(
+                {
+                    "role": "tool",
+                    "content": [{"type": "tool-result", "output": {"type": "json", "value": shared}}],
+                }
+            )
+        messages.append({"role": "assistant", "content": "Fetched"})
+
+        options = CompactOptions(
+            storage=self.storage_adapter,
+            boundary="entire-conversation",
+            serialize_result=serializer,
+        )
+        result = self.async_run(compact_messages(messages, options))
+
+        assert len(calls) == 1
+        for msg in result[1:3]:
+            key = msg["content"][0]["output"]["value"].split("Key: ")[1].split(". ")[0]
+            assert json.loads((Path(self.temp_dir) / key).read_text()) == shared
 
     def test_text_output_compaction(self):
         """Test compaction of text-type tool outputs."""
@@ -239,69 +293,383 @@ class TestCompactor:
 
         options = CompactOptions(storage=self.storage_adapter, boundary="entire-conversation")
 
-        result = async_run(compact_messages(messages, options))
+        result = self.async_run(compact_messages(messages, options))
 
         # Text output should be compacted
         tool_output = result[1]["content"][0]["output"]
         assert tool_output["type"] == "text"
         assert "Written to" in tool_output["value"]
 
+    def test_multiple_tool_results_written(self):
+        """Test that every tool result in the window is written to its own key."""
+        messages = [
+            {"role": "user", "content": "Fetch everything"},
+            {
+                "role": "tool",
+                "content": [
+                    {"type": "tool-result", "output": {"type": "json", "value": {"n": i}}}
+                    for i in range(10)
+                ],
+            },
+            {"role": "assistant", "content": "Fetched"},
+        ]
 
-class TestBoundaryDetection:
-    """Test suite for boundary detection logic."""
+        options = CompactOptions(storage=self.storage_adapter, boundary="entire-conversation")
+
+        result = self.async_run(compact_messages(messages, options))
+
+        keys = set()
+        for part in result[1]["content"]:
+            value = part["output"]["value"]
+            assert "Written to" in value
+            key = value.split("Key: ")[1].split(". ")[0]
+            keys.add(key)
+            assert json.loads((Path(self.temp_dir) / key).read_text())["n"] >= 0
+
+        assert len(keys) == 10
+
+    def test_parallel_write_throughput(self, monkeypatch):
+        """Test that the async API overlaps slow storage writes."""
+        import threading
+        import time
+
+        delay = 0.05
+        count = 32
+        active = []
+        peak = []
+        lock = threading.Lock()
+        write = self.storage_adapter.write
+
+        def slow_write(params):
+            with lock:
+                active.append(params.key)
+                peak.append(len(active))
+            time.sleep(delay)
+            with lock:
+                active.remove(params.key)
+            return write(params)
+
+        monkeypatch.setattr(self.storage_adapter, "write", slow_write)
+
+        messages = [{"role": "user", "content": "Fetch everything"}]
+        for i in range(count):
+            messages.append(
+                {
+                    "role": "tool",
+                    "content": [{"type": "tool-result", "output": {"type": "text", "text": f"{i}"}}],
+                }
+            )
+        messages.append({"role": "assistant", "content": "Fetched"})
+
+        options = CompactOptions(storage=self.storage_adapter, boundary="entire-conversation")
+
+        result = self.async_run(compact_messages(messages, options))
+
+        assert all("Written to" in m["content"][0]["output"]["value"] for m in result[1:-1])
+        assert max(peak) > 1
+
+    @pytest.mark.parametrize("use_orjson", [True, False])
+    def test_default_serializer_streams_json(self, monkeypatch, use_orjson):
+        """Test that streamed JSON outputs match the default serializer's output."""
+        from ctxzippy.strategies import write_tool_results
+
+        if not use_orjson:
+            monkeypatch.setattr(write_tool_results, "orjson", None)
+        elif write_tool_results.orjson is None:
+            pytest.skip("orjson is not installed")
+
+        value = {"rows": [{"id": i, "name": f"row {i}"} for i in range(50)], "ok": True}
+        messages = [
+            {"role": "user", "content": "Process"},
+            {
+                "role": "tool",
+                "content": [{"type": "tool-result", "output": {"type": "json", "value": value}}],
+            },
+            {"role": "assistant", "content": "Done"},
+        ]
+
+        options = CompactOptions(storage=self.storage_adapter, boundary="entire-conversation")
+
+        result = self.async_run(compact_messages(messages, options))
+
+        key = result[1]["content"][0]["output"]["value"].split("Key: ")[1].split(". ")[0]
+        content = (Path(self.temp_dir) / key).read_text()
+        assert content == write_tool_results.default_serialize_result(value)
+        assert json.loads(content) == value
 
-    def test_detect_window_entire_conversation(self):
-        """Test window detection for entire conversation."""
-        from ctxzippy.strategies.write_tool_results import detect_window_range
+    @pytest.mark.parametrize("stream_json", [True, False])
+    def test_default_serializer_falls_back_for_unencodable_values(self, monkeypatch, stream_json):
+        """Test that values orjson rejects are serialized with the stdlib encoder."""
+        from ctxzippy.strategies import write_tool_results
 
+        if not stream_json:
+            monkeypatch.delattr(type(self.storage_adapter), "open_write_stream")
+
+        value = {"id": 2**70, "ratio": float("nan")}
         messages = [
-            {"role": "user", "content": "1"},
-            {"role": "tool", "content": []},
-            {"role": "assistant", "content": "2"},
-            {"role": "tool", "content": []},
-            {"role": "assistant", "content": "3"},
+            {"role": "user", "content": "Process"},
+            {
+                "role": "tool",
+                "content": [{"type": "tool-result", "output": {"type": "json", "value": value}}],
+            },
+            {"role": "assistant", "content": "Done"},
         ]
 
-        start, end = detect_window_range(messages, "entire-conversation")
-        assert start == 0
-        assert end == 4  # Excludes last message
+        options = CompactOptions(storage=self.storage_adapter, boundary="entire-conversation")
+        result = self.async_run(compact_messages(messages, options))
+
+        key = result[1]["content"][0]["output"]["value"].split("Key: ")[1].split(". ")[0]
+        content = (Path(self.temp_dir) / key).read_text()
+        assert content == json.dumps(value, indent=2)
+        assert content == write_tool_results.default_serialize_result(value)
+
+    def test_default_serializer_is_orjson(self, monkeypatch):
+        """Test that the default serializer encodes with orjson when it is installed."""
+        orjson = pytest.importorskip("orjson")
 
-    def test_detect_window_since_last_text(self):
-        """Test window detection for since-last-assistant-or-user-text."""
-        from ctxzippy.strategies.write_tool_results import detect_window_range
+        calls = []
+        real_dumps = orjson.dumps
 
+        def spy_dumps(*args, **kwargs):
+            calls.append(args[0])
+            return real_dumps(*args, **kwargs)
+
+        monkeypatch.setattr(orjson, "dumps", spy_dumps)
+
+        value = {"data": "large" * 1000}
         messages = [
-            {"role": "tool", "content": []},
-            {"role": "assistant", "content": "Response"},
-            {"role": "tool", "content": []},
-            {"role": "tool", "content": []},
-            {"role": "assistant", "content": "Final"},
+            {"role": "user", "content": "Process"},
+            {
+                "role": "tool",
+                "content": [{"type": "tool-result", "output": {"type": "json", "value": value}}],
+            },
+            {"role": "assistant", "content": "Done"},
         ]
 
-        start, end = detect_window_range(messages, "since-last-assistant-or-user-text")
-        assert start == 2  # After the first assistant message
-        assert end == 4  # Excludes last message
+        options = CompactOptions(storage=self.storage_adapter, boundary="entire-conversation")
+        result = self.async_run(compact_messages(messages, options))
 
-    def test_detect_window_first_n(self):
-        """Test window detection for first-n-messages."""
-        from ctxzippy.strategies.write_tool_results import detect_window_range
+        assert calls == [value]
+        key = result[1]["content"][0]["output"]["value"].split("Key: ")[1].split(". ")[0]
+        assert json.loads((Path(self.temp_dir) / key).read_text()) == value
 
+    def test_in_place_compaction(self):
+        """Test that in_place compaction returns the input list itself."""
         messages = [
-            {"role": "system", "content": "System"},
-            {"role": "user", "content": "User"},
-            {"role": "tool", "content": []},
-            {"role": "tool", "content": []},
-            {"role": "assistant", "content": "Assistant"},
+            {"role": "user", "content": "Process"},
+            {
+                "role": "tool",
+                "content": [{"type": "tool-result", "output": {"type": "text", "text": "data"}}],
+            },
+            {"role": "assistant", "content": "Done"},
         ]
 
-        start, end = detect_window_range(messages, {"type": "first-n-messages", "count": 2})
-        assert start == 2  # After first 2 messages
-        assert end == 4  # Excludes last message
+        options = CompactOptions(
+            storage=self.storage_adapter, boundary="entire-conversation", in_place=True
+        )
+
+        result = self.async_run(compact_messages(messages, options))
+
+        assert result is messages
+        assert "Written to" in messages[1]["content"][0]["output"]["value"]
+
+    @pytest.mark.parametrize(
+        "boundary", ["entire-conversation", "since-last-assistant-or-user-text"]
+    )
+    def test_single_pass_invariant(self, boundary):
+        """Test that compaction visits each message at most once."""
+
+        class CountingList(list):
+            """List that counts reads of individual items by index."""
+
+            count = 0
+
+            def __getitem__(self, index):
+                if isinstance(index, int):
+                    CountingList.count += 1
+                return super().__getitem__(index)
+
+        turn = [
+            {"role": "user", "content": "Request"},
+            {"role": "assistant", "content": [{"type": "tool-call", "toolName": "fetch"}]},
+        ]
+        messages = CountingList()
+        for _ in range(500):
+            messages.extend(dict(m) for m in turn)
+            messages.append(
+                {
+                    "role": "tool",
+                    "content": [{"type": "tool-result", "output": {"type": "text", "text": "data"}}],
+                }
+            )
+        messages.append({"role": "assistant", "content": "Done"})
+
+        options = CompactOptions(storage=self.storage_adapter, boundary=boundary, in_place=True)
+        self.async_run(compact_messages(messages, options))
+
+        assert CountingList.count <= len(messages)
+        assert "Written to" in list.__getitem__(messages, -2)["content"][0]["output"]["value"]
+
+    def test_file_output_persistence(self):
+        """Test that file outputs are copied into storage only when enabled."""
+        src = Path(self.temp_dir) / "artifact.csv"
+        src.write_text("id,value\n1,42\n")
+
+        def make_messages():
+            return [
+                {"role": "user", "content": "Export"},
+                {
+                    "role": "tool",
+                    "content": [
+                        {"type": "tool-result", "output": {"type": "file", "path": str(src)}}
+                    ],
+                },
+                {"role": "assistant", "content": "Exported"},
+            ]
+
+        # Disabled by default: file outputs are left alone
+        result = self.async_run(
+            compact_messages(
+                make_messages(),
+                CompactOptions(storage=self.storage_adapter, boundary="entire-conversation"),
+            )
+        )
+        assert result[1]["content"][0]["output"]["type"] == "file"
+
+        options = CompactOptions(
+            storage=self.storage_adapter,
+            boundary="entire-conversation",
+            persist_file_outputs=True,
+        )
+        result = self.async_run(compact_messages(make_messages(), options))
+
+        value = result[1]["content"][0]["output"]["value"]
+        assert "Written to" in value
+        key = value.split("Key: ")[1].split(". ")[0]
+        assert (Path(self.temp_dir) / key).read_text() == "id,value\n1,42\n"
+
+    def test_writes_run_off_the_event_loop(self, monkeypatch):
+        """Test that the async API never blocks the event loop thread on storage I/O."""
+        import threading
+
+        threads = set()
+        write = self.storage_adapter.write
+
+        def recording_write(params):
+            threads.add(threading.get_ident())
+            return write(params)
+
+        monkeypatch.setattr(self.storage_adapter, "write", recording_write)
+
+        messages = [
+            {"role": "user", "content": "Process"},
+            {
+                "role": "tool",
+                "content": [{"type": "tool-result", "output": {"type": "text", "text": "data"}}],
+            },
+            {"role": "assistant", "content": "Done"},
+        ]
+        options = CompactOptions(storage=self.storage_adapter, boundary="entire-conversation")
+
+        async def run():
+            loop_thread = threading.get_ident()
+            await compact_messages(messages, options)
+            return loop_thread
+
+        loop_thread = self.async_run(run())
+
+        assert threads and loop_thread not in threads
+
+    def test_compact_messages_sync(self):
+        """Test the synchronous API outside of an event loop."""
+        messages = [
+            {"role": "user", "content": "Process"},
+            {
+                "role": "tool",
+                "content": [
+                    {"type": "tool-result", "output": {"type": "json", "value": {"test": "data"}}}
+                ],
+            },
+            {"role": "assistant", "content": "Done"},
+        ]
+
+        options = CompactOptions(storage=self.storage_adapter, boundary="entire-conversation")
+
+        result = compact_messages_sync(messages, options)
+
+        assert "Written to" in result[1]["content"][0]["output"]["value"]
+
+    def test_compact_messages_sync_inside_running_loop(self):
+        """Test that the synchronous API also works when called from a coroutine."""
+        messages = [
+            {"role": "user", "content": "Process"},
+            {
+                "role": "tool",
+                "content": [{"type": "tool-result", "output": {"type": "text", "text": "data"}}],
+            },
+            {"role": "assistant", "content": "Done"},
+        ]
+
+        options = CompactOptions(storage=self.storage_adapter, boundary="entire-conversation")
+
+        async def run():
+            return compact_messages_sync(messages, options)
+
+        result = self.async_run(run())
+
+        assert "Written to" in result[1]["content"][0]["output"]["value"]
+
+
+class TestBoundaryDetection:
+    """Test suite for boundary detection logic."""
+
+    @pytest.mark.parametrize(
+        "messages,boundary,expected",
+        [
+            pytest.param(
+                [
+                    {"role": "user", "content": "1"},
+                    {"role": "tool", "content": []},
+                    {"role": "assistant", "content": "2"},
+                    {"role": "tool", "content": []},
+                    {"role": "assistant", "content": "3"},
+                ],
+                "entire-conversation",
+                (0, 4),  # Excludes last message
+                id="entire-conversation",
+            ),
+            pytest.param(
+                [
+                    {"role": "tool", "content": []},
+                    {"role": "assistant", "content": "Response"},
+                    {"role": "tool", "content": []},
+                    {"role": "tool", "content": []},
+                    {"role": "assistant", "content": "Final"},
+                ],
+                "since-last-assistant-or-user-text",
+                (2, 4),  # After the first assistant message
+                id="since-last-text",
+            ),
+            pytest.param(
+                [
+                    {"role": "system", "content": "System"},
+                    {"role": "user", "content": "User"},
+                    {"role": "tool", "content": []},
+                    {"role": "tool", "content": []},
+                    {"role": "assistant", "content": "Assistant"},
+                ],
+                {"type": "first-n-messages", "count": 2},
+                (2, 4),  # After first 2 messages
+                id="first-n",
+            ),
+        ],
+    )
+    def test_detect_window(self, messages, boundary, expected):
+        """Test window detection for each boundary type."""
+        assert detect_window_range(messages, boundary) == expected
 
     def test_message_has_text_content(self):
         """Test detection of messages with text content."""
-        from ctxzippy.strategies.write_tool_results import message_has_text_content
-
         # String content
         assert message_has_text_content({"content": "Hello"})
 
@@ -316,3 +684,12 @@ class TestBoundaryDetection:
 
         # None
         assert not message_has_text_content(None)
+
+    def test_format_storage_path_for_display(self):
+        """Test display formatting for the supported storage URI forms."""
+        assert format_storage_path_for_display("", "a.txt") == "a.txt"
+        assert format_storage_path_for_display("blob:", "a.txt") == "blob:///a.txt"
+        assert format_storage_path_for_display("blob:/", "a.txt") == "blob:///a.txt"
+        assert format_storage_path_for_display("blob://box/pre/", "a.txt") == "blob://box/pre/a.txt"
+        assert format_storage_path_for_display("file:///tmp", "a.txt") == "file:///tmp:a.txt"
+        assert format_storage_path_for_display("s3://bucket", "a.txt") == "s3://bucket:a.txt"
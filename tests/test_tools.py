@@ -1,23 +1,30 @@
 """Tests for reader tools."""
 
-import tempfile
 import json
+import re
 
 import pytest
 
-from ctxzippy.tools import read_file, grep_and_search_file, ReadFileOptions, GrepAndSearchFileOptions
+from ctxzippy.tools import (
+    read_file,
+    grep_and_search_file,
+    grep_and_search_files_async,
+    ReadFileOptions,
+    GrepAndSearchFileOptions,
+)
 from ctxzippy.adapters import FileStorageAdapter, StorageWriteParams
-from ctxzippy.storage import register_known_key, clear_known_keys
+from ctxzippy.storage import register_known_key, clear_known_keys, set_current_adapter
 
 
 class TestReadFileTool:
     """Test suite for the read file tool."""
 
-    def setup_method(self):
-        """Set up test fixtures."""
+    @pytest.fixture(autouse=True)
+    def _use_storage(self, storage_adapter):
+        """Set up test fixtures on the module's shared storage."""
         clear_known_keys()
-        self.temp_dir = tempfile.mkdtemp(prefix="ctxzippy_tools_test_")
-        self.adapter = FileStorageAdapter(base_dir=self.temp_dir)
+        self.adapter = storage_adapter
+        self.temp_dir = str(storage_adapter.base_dir)
 
         # Write a test file
         self.adapter.write(
@@ -31,12 +38,8 @@ class TestReadFileTool:
         # Register the key as known
         register_known_key(str(self.adapter), "test_data.json")
 
-    def teardown_method(self):
-        """Clean up after tests."""
+        yield
         clear_known_keys()
-        import shutil
-
-        shutil.rmtree(self.temp_dir, ignore_errors=True)
 
     def test_read_known_file(self):
         """Test reading a file that was previously written."""
@@ -69,6 +72,17 @@ class TestReadFileTool:
         assert result["key"] == "test_data.json"
         assert "test" in result["content"]
 
+    def test_read_with_current_adapter(self):
+        """Test that reads without storage options use the current adapter."""
+        with set_current_adapter(self.adapter):
+            result = read_file("test_data.json")
+
+        assert result["storage"] == str(self.adapter)
+        assert "123" in result["content"]
+
+        # Outside the block the process-wide default storage is used again
+        assert "unknown key" in read_file("test_data.json")["content"].lower()
+
     def test_read_error_handling(self):
         """Test error handling when reading fails."""
         # Create adapter but don't write file
@@ -85,11 +99,12 @@ class TestReadFileTool:
 class TestGrepAndSearchFileTool:
     """Test suite for the grep and search file tool."""
 
-    def setup_method(self):
-        """Set up test fixtures."""
+    @pytest.fixture(autouse=True)
+    def _use_storage(self, storage_adapter):
+        """Set up test fixtures on the module's shared storage."""
         clear_known_keys()
-        self.temp_dir = tempfile.mkdtemp(prefix="ctxzippy_grep_test_")
-        self.adapter = FileStorageAdapter(base_dir=self.temp_dir)
+        self.adapter = storage_adapter
+        self.temp_dir = str(storage_adapter.base_dir)
 
         # Write test files
         test_data = {
@@ -122,12 +137,8 @@ class TestGrepAndSearchFileTool:
         register_known_key(str(self.adapter), "data.json")
         register_known_key(str(self.adapter), "log.txt")
 
-    def teardown_method(self):
-        """Clean up after tests."""
+        yield
         clear_known_keys()
-        import shutil
-
-        shutil.rmtree(self.temp_dir, ignore_errors=True)
 
     def test_search_json_file(self):
         """Test searching in a JSON file."""
@@ -177,6 +188,105 @@ class TestGrepAndSearchFileTool:
         assert "unknown key" in result["content"].lower()
         assert "Tool cannot be used" in result["content"]
 
+        # Unknown keys are rejected before the pattern is even compiled
+        result = grep_and_search_file("unknown.txt", "(invalid", options=options)
+        assert "Tool cannot be used" in result["content"]
+
+    @pytest.mark.parametrize("pattern", ["ERROR", r"INFO\s+\w+", "(?i)retrying"])
+    def test_repeated_pattern_uses_compile_cache(self, pattern):
+        """Test that repeated searches with one pattern reuse its compiled form."""
+        from ctxzippy.storage.grep import _compile
+
+        options = GrepAndSearchFileOptions(storage=self.adapter)
+        first = grep_and_search_file("log.txt", pattern, options=options)
+        assert first["matches"]
+
+        hits = _compile.cache_info().hits
+        for _ in range(3):
+            assert grep_and_search_file("log.txt", pattern, options=options) == first
+        assert _compile.cache_info().hits >= hits + 3
+
+    def test_search_with_compiled_pattern(self):
+        """Test passing an already compiled pattern."""
+        options = GrepAndSearchFileOptions(storage=self.adapter)
+
+        result = grep_and_search_file("log.txt", re.compile("error", re.I), options=options)
+        assert result["pattern"] == "error"
+        assert len(result["matches"]) == 2
+
+        # Flags are added on top of the compiled pattern's own
+        result = grep_and_search_file("log.txt", re.compile("error"), flags="i", options=options)
+        assert len(result["matches"]) == 2
+
+    def test_large_file_linear_time(self):
+        """Test that a backtracking-prone pattern stays linear when re2 is installed."""
+        import time
+
+        pytest.importorskip("re2")
+        self.adapter.write(StorageWriteParams(key="adversarial.txt", body="a" * 10**6 + "c"))
+        register_known_key(str(self.adapter), "adversarial.txt")
+        options = GrepAndSearchFileOptions(storage=self.adapter)
+
+        start = time.perf_counter()
+        result = grep_and_search_file("adversarial.txt", "(a+)+b", options=options)
+        elapsed = time.perf_counter() - start
+
+        assert result["matches"] == []
+        assert elapsed < 5
+
+    @pytest.mark.parametrize(
+        "text,pattern,flags",
+        [
+            ("caf\u00e9", r"^\w+$", ""),
+            ("x\u0663y", r"x\dy", ""),
+            ("a\u00a0b", r"a\sb", ""),
+            ("na\u00efve", r"\bna\u00efve\b", ""),
+            ("\u00c9COLE", "\u00e9cole", "i"),
+            ("xy", "xa{,3}y", ""),
+        ],
+    )
+    def test_matches_like_re_with_re2(self, text, pattern, flags):
+        """Test that installing re2 doesn't change results for syntax it reads differently."""
+        pytest.importorskip("re2")
+        from ctxzippy.storage.grep import grep_text
+
+        expected = re.compile(pattern, re.I if flags else 0).search(text) is not None
+        assert expected
+        assert [line.content for line in grep_text(text, pattern, flags=flags)] == [text]
+
+    def test_re2_fallback_is_quiet(self, capfd):
+        """Test that patterns re2 rejects fall back to re without logging."""
+        pytest.importorskip("re2")
+        from ctxzippy.storage.grep import grep_text
+
+        assert [line.content for line in grep_text("foobar", "foo(?=bar)")] == ["foobar"]
+        assert capfd.readouterr().err == ""
+
+    def test_search_large_file_memory(self):
+        """Test that searching a large file doesn't load it into memory whole."""
+        import tracemalloc
+
+        from ctxzippy.storage import grep_object_bytes
+
+        line = "2024-01-01 INFO ordinary log line %08d\n"
+        body = "".join(line % i for i in range(10 * 1024 * 1024 // len(line)))  # ~10 MB
+        self.adapter.write(StorageWriteParams(key="big.log", body=body))
+        del body
+        register_known_key(str(self.adapter), "big.log")
+        options = GrepAndSearchFileOptions(storage=self.adapter)
+
+        for search in (
+            lambda: grep_and_search_file("big.log", "ERROR", options=options)["matches"],
+            lambda: grep_object_bytes(self.adapter, "big.log", re.compile(rb"ERROR")),
+        ):
+            tracemalloc.start()
+            try:
+                assert search() == []
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            assert peak < 2 * 1024 * 1024
+
     def test_invalid_regex(self):
         """Test handling of invalid regex patterns."""
         options = GrepAndSearchFileOptions(storage=self.adapter)
@@ -197,6 +307,176 @@ class TestGrepAndSearchFileTool:
         assert "matches" in result
         assert len(result["matches"]) == 0
 
+    def test_search_compact_json(self):
+        """Test that single-line JSON is pretty-printed before searching."""
+        self.adapter.write(
+            StorageWriteParams(key="compact.json", body=json.dumps({"a": 1, "b": {"c": "hit"}}))
+        )
+        register_known_key(str(self.adapter), "compact.json")
+        options = GrepAndSearchFileOptions(storage=self.adapter)
+
+        result = grep_and_search_file("compact.json", "hit", options=options)
+        assert result["matches"] == [{"line_number": 4, "content": '    "c": "hit"'}]
+
+    def test_search_multiple_files_async(self, event_loop):
+        """Test searching several keys concurrently."""
+        options = GrepAndSearchFileOptions(storage=self.adapter)
+
+        results = event_loop.run_until_complete(
+            grep_and_search_files_async(
+                ["log.txt", "unknown.txt", "data.json"], "error|alice", flags="i", options=options
+            )
+        )
+
+        assert [r["key"] for r in results] == ["log.txt", "unknown.txt", "data.json"]
+        assert len(results[0]["matches"]) == 2
+        assert "unknown key" in results[1]["content"].lower()
+        assert len(results[2]["matches"]) == 2  # name and email lines
+
+    def test_grep_object_bytes(self):
+        """Test searching raw bytes matches the text search."""
+        import re
+
+        from ctxzippy.storage import grep_object, grep_object_bytes
+
+        for pattern in (re.compile("ERROR"), re.compile(b"ERROR")):
+            matches = grep_object_bytes(self.adapter, "log.txt", pattern)
+            assert matches == grep_object(self.adapter, "log.txt", re.compile("ERROR"))
+            assert [m.line_number for m in matches] == [2, 5]
+
+    def test_grep_stops_at_max_results(self):
+        """Test that the scan stops once max_results lines have matched."""
+        import re
+
+        from ctxzippy.storage import grep_object
+
+        # Several hits per line must still count as a single result line
+        body = "\n".join(f"hit {i} hit hit" for i in range(1, 10001))
+        self.adapter.write(StorageWriteParams(key="hits.txt", body=body))
+
+        pattern = re.compile("hit")
+        matches = grep_object(self.adapter, "hits.txt", pattern, max_results=3)
+        assert [m.line_number for m in matches] == [1, 2, 3]
+        assert matches[2].content == "hit 3 hit hit"
+
+    @pytest.mark.parametrize(
+        "text,pattern,expected",
+        [
+            ("foo\nbar", r"foo(?!\s)", [(1, "foo")]),
+            ("x\nfoo", r"(?<!\s)foo", [(2, "foo")]),
+            ("a\x0cb", "^b", [(2, "b")]),
+            ("a\u2028b", "^b", [(2, "b")]),
+            ("a\x1cb", "^b", [(2, "b")]),
+            ("a\rb\r\nc", "^[bc]", [(2, "b"), (3, "c")]),
+        ],
+    )
+    def test_search_matches_per_line_search(self, text, pattern, expected):
+        """Test that results match searching each of text.splitlines() separately."""
+        from ctxzippy.storage import grep_object
+        from ctxzippy.storage.grep import grep_text
+
+        assert expected == [
+            (i, line) for i, line in enumerate(text.splitlines(), 1) if re.search(pattern, line)
+        ]
+
+        assert [(m.line_number, m.content) for m in grep_text(text, pattern)] == expected
+
+        self.adapter.write(StorageWriteParams(key="separators.txt", body=text))
+        register_known_key(str(self.adapter), "separators.txt")
+        matches = grep_object(self.adapter, "separators.txt", re.compile(pattern))
+        assert [(m.line_number, m.content) for m in matches] == expected
+
+        options = GrepAndSearchFileOptions(storage=self.adapter)
+        result = grep_and_search_file("separators.txt", pattern, options=options)
+        assert [(m["line_number"], m["content"]) for m in result["matches"]] == expected
+
+    def test_search_reports_line_numbers(self):
+        """Test that matches report the line they occur on, once per line."""
+        options = GrepAndSearchFileOptions(storage=self.adapter)
+
+        result = grep_and_search_file("log.txt", r"INFO|Start", options=options)
+        assert [m["line_number"] for m in result["matches"]] == [1, 4, 6]
+        assert result["matches"][0]["content"] == "2024-01-01 INFO Starting application"
+
+        # A pattern that could only match across a line break matches nothing
+        result = grep_and_search_file("log.txt", r"application\s+2024", options=options)
+        assert result["matches"] == []
+
+
+class TestHyperscanScan:
+    """Differential tests of the Hyperscan candidate scan against the re scanner."""
+
+    CONTENT = b"alpha\nbeta\n\naaa\nfoo bar\nend\n\nxy\nxay\nlast"
+
+    @pytest.fixture(autouse=True)
+    def _require_hyperscan(self):
+        """Skip unless the hyperscan extra is installed."""
+        pytest.importorskip("hyperscan")
+
+    @pytest.mark.parametrize("max_results", [1, 2, 100])
+    @pytest.mark.parametrize(
+        "pattern",
+        [
+            rb"a+",
+            rb"(?i)FOO",
+            rb"r$",
+            rb"^$",  # empty lines only
+            rb"x*",  # empty matches on every line
+            rb"a\n",  # matches ending on a newline
+            rb"beta\n\n",  # only matches across a line break
+        ],
+    )
+    def test_matches_re_scanner(self, pattern, max_results):
+        """Test that Hyperscan reports the same lines as the re scanner."""
+        from ctxzippy.storage.grep import _scan_lines, _scan_lines_hyperscan
+
+        compiled = re.compile(pattern)
+        expected = _scan_lines(self.CONTENT, compiled, max_results)
+
+        assert _scan_lines_hyperscan(self.CONTENT, compiled, max_results) == expected
+
+    def test_halts_at_max_results(self):
+        """Test that the scan stops once max_results lines have matched."""
+        from ctxzippy.storage.grep import _scan_lines_hyperscan
+
+        content = b"\n".join(b"hit %d hit" % i for i in range(1, 10001))
+        matches = _scan_lines_hyperscan(content, re.compile(rb"hit"), 3)
+        assert matches == [(1, b"hit 1 hit"), (2, b"hit 2 hit"), (3, b"hit 3 hit")]
+
+    @pytest.mark.parametrize(
+        "pattern",
+        [
+            rb"xa{,3}y",  # a 0 to 3 repeat in re, literal text in Hyperscan
+            rb"fo(?=o)",  # lookarounds are unsupported
+            rb"(a)\1",  # backreferences are unsupported
+        ],
+    )
+    def test_falls_back_to_re(self, pattern):
+        """Test that patterns Hyperscan can't run as re would use the re scanner."""
+        from ctxzippy.storage.grep import _scan_bytes, _scan_lines
+
+        compiled = re.compile(pattern)
+        expected = _scan_lines(self.CONTENT, compiled, 100)
+
+        assert expected
+        assert _scan_bytes(self.CONTENT, compiled, 100) == expected
+
+    def test_scan_error_falls_back_to_re(self, monkeypatch):
+        """Test that a Hyperscan scan error falls back to the re scanner."""
+        from unittest.mock import MagicMock
+
+        from ctxzippy.storage import grep
+
+        database = MagicMock()
+        database.scan.side_effect = RuntimeError("scan failed")
+        monkeypatch.setattr(grep, "_hyperscan_database", lambda pattern, flags: database)
+
+        compiled = re.compile(rb"a+")
+        assert grep._scan_lines_hyperscan(self.CONTENT, compiled, 100) is None
+        assert grep._scan_bytes(self.CONTENT, compiled, 100) == grep._scan_lines(
+            self.CONTENT, compiled, 100
+        )
+
 
 class TestKnownKeys:
     """Test the known keys tracking system."""
@@ -225,3 +505,29 @@ class TestKnownKeys:
         # Clear and verify
         clear_known_keys()
         assert not is_known_key("file:///tmp", "file1.txt")
+
+    def test_register_keys_concurrently(self):
+        """Test that keys registered from many threads are all retained."""
+        import threading
+
+        from ctxzippy.storage import register_known_key, is_known_key, clear_known_keys
+
+        clear_known_keys()
+
+        def register(n):
+            for i in range(200):
+                register_known_key(f"file:///tmp/{n % 4}", f"key-{n}-{i}.txt")
+
+        threads = [threading.Thread(target=register, args=(n,)) for n in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert all(
+            is_known_key(f"file:///tmp/{n % 4}", f"key-{n}-{i}.txt")
+            for n in range(8)
+            for i in range(200)
+        )
+
+        clear_known_keys()